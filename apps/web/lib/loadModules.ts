@@ -13,9 +13,36 @@ export interface ModuleManifest {
   disclaimer?: string;
 }
 
+// Catálogo compilado por `mega ingest` (content_engine.src.catalog); usado só se
+// nenhum mtime observado mudou desde a compilação. A versão do formato vem do
+// mesmo arquivo lido pelo Python.
+const CATALOG_VERSION_FILE = path.join('packages', 'content-engine', 'src', 'catalog_version.json');
+
+function loadCatalog(base: string): ModuleManifest[] | null {
+  const file = path.join(process.cwd(), 'data', 'content_catalog.json');
+  if (!fs.existsSync(file)) return null;
+  try {
+    const { version } = JSON.parse(fs.readFileSync(path.join(process.cwd(), CATALOG_VERSION_FILE), 'utf-8'));
+    const cat = JSON.parse(fs.readFileSync(file, 'utf-8'));
+    if (cat.version !== version || cat.modules_dir !== fs.realpathSync(base)) return null;
+    for (const [rel, v] of Object.entries<[number, number] | null>(cat.stamp || {})) {
+      let st: fs.BigIntStats | null = null;
+      try { st = fs.statSync(path.join(base, rel), { bigint: true }); } catch { st = null; }
+      // mtime em ns não cabe em double: os dois lados passam pelo mesmo arredondamento
+      if (v === null ? st !== null : !st || Number(st.mtimeNs) !== v[0] || Number(st.size) !== v[1]) return null;
+    }
+    return Object.values(cat.modules) as ModuleManifest[];
+  } catch (e) {
+    console.warn('Erro lendo catálogo', file, e);
+    return null;
+  }
+}
+
 export function loadManifests(): ModuleManifest[] {
   const base = path.join(process.cwd(), 'content', 'modules');
   if (!fs.existsSync(base)) return [];
+  const cached = loadCatalog(base);
+  if (cached) return cached;
   const dirs = fs.readdirSync(base).filter(d => fs.statSync(path.join(base, d)).isDirectory());
   const manifests: ModuleManifest[] = [];
   for (const d of dirs) {
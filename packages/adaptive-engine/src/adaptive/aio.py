@@ -0,0 +1,97 @@
+from __future__ import annotations
+import asyncio, functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Iterable
+from .engine import AdaptiveEngine, RatingEvent
+from mega_common.config import CONFIG
+
+class AsyncAdaptiveEngine:
+    """
+    Fachada asyncio sobre `AdaptiveEngine` para a camada web/API.
+    O I/O de storage roda num executor limitado (`async_workers`) e ratings
+    concorrentes do mesmo (learner, item) são serializados por um lock por
+    chave, para que a sequência leitura -> cálculo -> gravação não se intercale.
+    Leituras não pegam o lock: o cache de mastery do engine é versionado e
+    descarta valores lidos durante uma escrita.
+    O engine do learner é resolvido dentro da tarefa do executor e fica
+    fixado (`AdaptiveEngine.pinned`) até ela terminar.
+    """
+    def __init__(self, engine: AdaptiveEngine | None = None, max_workers: int | None = None, **engine_kwargs):
+        self.engine = engine or AdaptiveEngine(**engine_kwargs)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or CONFIG.adaptive.async_workers,
+                                            thread_name_prefix="adaptive-io")
+        self._locks: dict[tuple, list] = {}  # chave -> [asyncio.Lock, usuários]; removido quando ninguém usa
+
+    def _call(self, learner_id: str | None, method: str, *args, **kwargs):
+        # roda no executor: o engine é resolvido e fixado junto com o uso, para
+        # que uma expulsão do LRU no meio da chamada não crie outra instância
+        if not learner_id:
+            return getattr(self.engine, method)(*args, **kwargs)
+        with self.engine.pinned(learner_id) as eng:
+            return getattr(eng, method)(*args, **kwargs)
+
+    async def _run(self, learner_id: str | None, method: str, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor,
+                                          functools.partial(self._call, learner_id, method, *args, **kwargs))
+
+    @asynccontextmanager
+    async def _locked(self, keys: Iterable[tuple]):
+        entries = []
+        for k in sorted(set(keys)):  # ordem fixa evita deadlock entre lotes
+            entry = self._locks.get(k)
+            if entry is None:
+                entry = self._locks[k] = [asyncio.Lock(), 0]
+            entry[1] += 1
+            entries.append((k, entry))
+        acquired = []
+        try:
+            for _, entry in entries:
+                await entry[0].acquire()
+                acquired.append(entry[0])
+            yield
+        finally:
+            for lock in acquired:
+                lock.release()
+            for k, entry in entries:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[k]
+
+    async def rate_item(self, item_id: str, rating: int, learner_id: str | None = None):
+        async with self._locked([("i", learner_id or "", item_id)]):
+            return await self._run(learner_id, "rate_item", item_id, rating)
+
+    async def rate_many(self, events: Iterable[tuple], learner_id: str | None = None):
+        evs = [RatingEvent(*e) for e in events]
+        async with self._locked(("i", learner_id or "", e.item_id) for e in evs):
+            return await self._run(learner_id, "rate_many", evs)
+
+    async def update_mastery(self, subskill: str, rating: int, learner_id: str | None = None):
+        async with self._locked([("m", learner_id or "", subskill)]):
+            return await self._run(learner_id, "update_mastery", subskill, rating)
+
+    async def update_mastery_many(self, events: Iterable[tuple], learner_id: str | None = None):
+        evs = [RatingEvent(*e) for e in events]
+        async with self._locked(("m", learner_id or "", e.subskill) for e in evs if e.subskill):
+            return await self._run(learner_id, "update_mastery_many", evs)
+
+    async def mastery(self, subskill: str, learner_id: str | None = None) -> float:
+        return await self._run(learner_id, "mastery", subskill)
+
+    async def due(self, limit: int | None = None, offset: int = 0, learner_id: str | None = None):
+        return await self._run(learner_id, "due", limit=limit, offset=offset)
+
+    async def snapshot(self, learner_id: str | None = None):
+        return await self._run(learner_id, "snapshot")
+
+    async def aclose(self):
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+        self.engine.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
@@ -0,0 +1,62 @@
+from __future__ import annotations
+import random, statistics, tempfile, time
+from pathlib import Path
+from typing import Dict, List
+from .engine import AdaptiveEngine
+
+BACKENDS = {"json": "data.json", "jsonl": "data.json", "sqlite": "data.db"}
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    qs = statistics.quantiles(samples, n=100, method="inclusive") if len(samples) > 1 else samples * 99
+    return {"p50_ms": round(qs[49] * 1000, 3), "p95_ms": round(qs[94] * 1000, 3),
+            "p99_ms": round(qs[98] * 1000, 3), "max_ms": round(max(samples) * 1000, 3)}
+
+def _disk_size(root: Path) -> int:
+    return sum(p.stat().st_size for p in root.rglob("*") if p.is_file())
+
+def bench_backend(backend: str, root: Path, learners: int = 10, items: int = 1000, ratings: int = 5000,
+                  subskills: int = 20, queries: int = 200, seed: int = 0) -> Dict:
+    """
+    Carga sintética num backend: `ratings` avaliações distribuídas entre
+    `learners` × `items`, depois `queries` chamadas de `due()` e
+    `mastery_snapshot()` em learners aleatórios. Tempos medidos com perf_counter.
+    """
+    rng = random.Random(seed)
+    eng = AdaptiveEngine(backend=backend, path=str(root / BACKENDS[backend]))
+    eng.max_learners = max(eng.max_learners, learners)
+    eng.history_path = None  # carga sintética não entra no histórico real de `adaptive.replay`
+    ids = [f"learner-{i}" for i in range(learners)]
+    t0 = time.perf_counter()
+    for _ in range(ratings):
+        learner = eng.for_learner(rng.choice(ids))
+        learner.rate_item(f"item-{rng.randrange(items)}", rng.randrange(3))
+        learner.update_mastery(f"skill-{rng.randrange(subskills)}", rng.randrange(3))
+    rate_secs = time.perf_counter() - t0
+    due_t, snap_t = [], []
+    far_future = int(time.time()) + 10**9
+    for _ in range(queries):
+        store = eng.for_learner(rng.choice(ids)).store
+        t = time.perf_counter()
+        store.due_items(now=far_future, limit=50)
+        due_t.append(time.perf_counter() - t)
+        t = time.perf_counter()
+        store.mastery_snapshot()
+        snap_t.append(time.perf_counter() - t)
+    eng.close()
+    return {
+        "backend": backend,
+        "ratings": ratings,
+        "ratings_per_sec": round(ratings / rate_secs, 1) if rate_secs else None,
+        "due": _percentiles(due_t),
+        "mastery_snapshot": _percentiles(snap_t),
+        "disk_bytes": _disk_size(root),
+    }
+
+def run(backends: List[str] | None = None, **scale) -> List[Dict]:
+    out = []
+    for backend in backends or list(BACKENDS):
+        with tempfile.TemporaryDirectory(prefix=f"mega-bench-{backend}-") as tmp:
+            out.append(bench_backend(backend, Path(tmp), **scale))
+    return out
@@ -1,6 +1,10 @@
 from __future__ import annotations
+import json, threading, time, weakref
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from .storage import JSONStorage, SQLiteStorage
+from typing import Iterable, NamedTuple
+from .storage import JSONStorage, JSONLStorage, SQLiteStorage, learner_path
 from .scheduler import IntervalScheduler
 from .exceptions import BackendNotSupportedError, InvalidRatingError
 from mega_common.config import CONFIG
@@ -9,19 +13,105 @@ from dataclasses import asdict
 
 log = get_logger("adaptive.engine")
 
+class RatingEvent(NamedTuple):
+    item_id: str
+    subskill: str | None
+    rating: int
+    timestamp: int | None = None
+
 class AdaptiveEngine:
-    def __init__(self, backend: str | None = None, path: str | None = None):
+    """
+    Motor adaptativo de um learner. Sem `learner_id` usa o store global
+    (`CONFIG.adaptive.path`); `for_learner(id)` devolve engines por learner
+    mantidos num LRU de stores abertos (`learner_cache_size`). Um engine
+    expulso do LRU que ainda está referenciado (ou fixado com `pinned`)
+    continua sendo o único do learner: pedir o mesmo learner devolve essa
+    instância em vez de reabrir o store a partir do disco.
+    """
+    def __init__(self, backend: str | None = None, path: str | None = None, learner_id: str | None = None,
+                 store=None):
         a = CONFIG.adaptive
         self.backend = backend or a.backend
-        data_path = path or a.path
-        p = Path(data_path)
-        if self.backend == "json":
-            self.store = JSONStorage(p)
-        elif self.backend == "sqlite":
-            self.store = SQLiteStorage(p)
-        else:
-            raise BackendNotSupportedError(self.backend)
+        self.path = Path(path or a.path)
+        self.learner_id = learner_id
+        self.store = store if store is not None else self._open_store(learner_id)
         self.scheduler = IntervalScheduler()
+        self._mastery_cache: dict[str, float] = {}
+        self._mastery_version: dict[str, int] = {}  # subskill -> nº de escritas; leitura antiga não volta ao cache
+        self._mastery_lock = threading.Lock()
+        self._learners: OrderedDict[str, AdaptiveEngine] = OrderedDict()
+        self._live: weakref.WeakValueDictionary[str, AdaptiveEngine] = weakref.WeakValueDictionary()
+        self._pins: dict[str, int] = {}
+        self._learners_lock = threading.RLock()
+        self.max_learners = a.learner_cache_size
+        self.history_path = Path(a.history_path) if a.history_path else None
+
+    def _open_store(self, learner_id: str | None):
+        a = CONFIG.adaptive
+        if self.backend == "json":
+            return JSONStorage(learner_path(self.path, learner_id))
+        if self.backend == "jsonl":
+            return JSONLStorage(learner_path(self.path, learner_id), compact_every=a.journal_compact_every,
+                                fsync=a.journal_fsync)
+        if self.backend == "sqlite":
+            return SQLiteStorage(self.path, journal_mode=a.sqlite_journal_mode, synchronous=a.sqlite_synchronous,
+                                 cache_kb=a.sqlite_cache_kb, learner_id=learner_id or "")
+        raise BackendNotSupportedError(self.backend)
+
+    def for_learner(self, learner_id: str) -> "AdaptiveEngine":
+        with self._learners_lock:
+            eng = self._learners.get(learner_id)
+            if eng is not None:
+                self._learners.move_to_end(learner_id)
+                return eng
+            eng = self._live.get(learner_id)  # expulso mas ainda em uso: reaproveita o mesmo store
+            if eng is None:
+                # SQLite: visão do mesmo banco (pool compartilhado); JSON: arquivo fragmentado do learner
+                store = self.store.for_learner(learner_id) if self.backend == "sqlite" else None
+                eng = AdaptiveEngine(self.backend, str(self.path), learner_id=learner_id, store=store)
+                eng.history_path = self.history_path
+                self._live[learner_id] = eng
+            self._learners[learner_id] = eng
+            while len(self._learners) > self.max_learners:
+                lid, evicted = self._learners.popitem(last=False)
+                if not self._pins.get(lid):
+                    evicted.close()  # libera arquivos; o store os reabre se a instância voltar a ser usada
+            return eng
+
+    @contextmanager
+    def pinned(self, learner_id: str):
+        """`for_learner` que não é fechado por expulsão do LRU enquanto o bloco roda."""
+        with self._learners_lock:
+            eng = self.for_learner(learner_id)
+            self._pins[learner_id] = self._pins.get(learner_id, 0) + 1
+        try:
+            yield eng
+        finally:
+            with self._learners_lock:
+                n = self._pins.pop(learner_id) - 1
+                if n:
+                    self._pins[learner_id] = n
+                elif self._learners.get(learner_id) is not eng:
+                    eng.close()
+
+    def close(self):
+        with self._learners_lock:
+            for eng in self._learners.values():
+                eng.close()
+            self._learners.clear()
+        self.store.close()
+
+    def _log_history(self, rows: list[tuple[str, int, int | None]]):
+        """Acrescenta (item_id, rating, timestamp) ao histórico usado por `adaptive.replay`."""
+        if not self.history_path:
+            return
+        now = int(time.time())
+        self.history_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.history_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps({"learner_id": self.learner_id or "", "item_id": item_id, "rating": rating,
+                                        "timestamp": now if ts is None else ts},
+                                       ensure_ascii=False, separators=(",", ":")) + "\n"
+                            for item_id, rating, ts in rows))
 
     def rate_item(self, item_id: str, rating: int):
         if rating not in (0,1,2):
@@ -29,18 +119,77 @@ class AdaptiveEngine:
         last_interval,_ = self.store.get_interval(item_id)
         result = self.scheduler.next(item_id, last_interval, rating)
         self.store.set_interval(item_id, result.next_interval)
+        self._log_history([(item_id, rating, None)])
         log.debug("Rated item %s => %s", item_id, asdict(result))
         return result
 
+    def rate_many(self, events: Iterable[tuple]) -> list:
+        """
+        Avalia vários (item_id, subskill, rating, timestamp) de uma vez: uma
+        leitura em lote, intervalos calculados em ordem e uma única gravação.
+        Item repetido no lote encadeia a partir do intervalo anterior do lote.
+        """
+        evs = [RatingEvent(*e) for e in events]
+        for e in evs:
+            if e.rating not in (0,1,2):
+                raise InvalidRatingError(e.rating)
+        last = {k: v[0] for k, v in self.store.get_intervals(e.item_id for e in evs).items()}
+        results, rows = [], []
+        for e in evs:
+            result = self.scheduler.next(e.item_id, last[e.item_id], e.rating)
+            last[e.item_id] = result.next_interval
+            results.append(result)
+            rows.append((e.item_id, result.next_interval, e.timestamp))
+        self.store.set_intervals(rows)
+        self._log_history([(e.item_id, e.rating, e.timestamp) for e in evs])
+        log.debug("Rated %d items em lote", len(results))
+        return results
+
+    def update_mastery_many(self, events: Iterable[tuple]) -> dict:
+        """Aplica os ratings por subskill (eventos sem subskill são ignorados) em uma única gravação."""
+        rows = []
+        for e in events:
+            e = RatingEvent(*e)
+            if e.rating not in (0,1,2):
+                raise InvalidRatingError(e.rating)
+            if e.subskill:
+                rows.append((e.subskill, e.rating))
+        self.store.update_mastery_many(rows)
+        touched = dict.fromkeys(s for s, _ in rows)
+        self._invalidate(touched)
+        return {s: self.mastery(s) for s in touched}
+
     def update_mastery(self, subskill: str, rating: int):
         if rating not in (0,1,2):
             raise InvalidRatingError(rating)
         self.store.update_mastery(subskill, rating)
-        snap = self.store.mastery_snapshot()
-        return {"subskill": subskill, "mastery": snap.get(subskill, 0.0)}
+        self._invalidate([subskill])
+        return {"subskill": subskill, "mastery": self.mastery(subskill)}
+
+    def _invalidate(self, subskills: Iterable[str]):
+        with self._mastery_lock:
+            for s in subskills:
+                self._mastery_version[s] = self._mastery_version.get(s, 0) + 1
+                self._mastery_cache.pop(s, None)
+
+    def mastery(self, subskill: str) -> float:
+        """
+        Consulta pontual com cache em memória, invalidado a cada escrita do
+        subskill. Uma leitura que se sobrepõe a uma escrita não é guardada:
+        o valor só entra no cache se a versão do subskill não mudou.
+        """
+        with self._mastery_lock:
+            if subskill in self._mastery_cache:
+                return self._mastery_cache[subskill]
+            version = self._mastery_version.get(subskill, 0)
+        value = self.store.mastery(subskill)
+        with self._mastery_lock:
+            if self._mastery_version.get(subskill, 0) == version:
+                self._mastery_cache[subskill] = value
+        return value
 
-    def due(self):
-        return self.store.due_items()
+    def due(self, limit: int | None = None, offset: int = 0):
+        return self.store.due_items(limit=limit, offset=offset)
 
     def snapshot(self):
         return self.store.mastery_snapshot()
\ No newline at end of file
@@ -1,8 +1,136 @@
+from __future__ import annotations
+import heapq, json, time, yaml
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List
+from mega_common.logging import get_logger
+
+log = get_logger("adaptive.recommendation")
+
+try:
+    from content_engine.src.catalog import MODULES_DIR as DEFAULT_MODULES_DIR, get_catalog
+except ImportError:
+    get_catalog = None
+    DEFAULT_MODULES_DIR = Path("content/modules")
+
+def load_item_subskills(modules_dir: str | Path = DEFAULT_MODULES_DIR) -> Dict[str, List[str]]:
+    """
+    Mapa item -> subskills a partir de `content/modules/*`. Questões com
+    `subskills` próprias usam essas; as demais herdam as do manifest. O id do
+    quiz e o id do módulo também mapeiam para os subskills do módulo.
+    Itens sem `id` recebem `<quiz_id>:<índice>`. Com o content-engine
+    disponível, vem do catálogo compilado (cache invalidado por mtime).
+    """
+    if get_catalog is not None:
+        return dict(get_catalog(modules_dir).item_subskills())
+    out: Dict[str, List[str]] = {}
+    for manifest in sorted(Path(modules_dir).glob("*/manifest.yaml")):
+        try:
+            data = yaml.safe_load(manifest.read_text(encoding="utf-8")) or {}
+        except Exception as e:
+            log.warning("Erro lendo %s: %s", manifest, e)
+            continue
+        mod_id = data.get("id") or manifest.parent.name
+        mod_skills = list(data.get("subskills") or [])
+        out[mod_id] = mod_skills
+        for quiz in sorted((manifest.parent / "quizzes").glob("*.json")):
+            try:
+                q = json.loads(quiz.read_text(encoding="utf-8"))
+            except Exception as e:
+                log.warning("Erro lendo %s: %s", quiz, e)
+                continue
+            quiz_id = q.get("id", quiz.stem) if isinstance(q, dict) else quiz.stem
+            questions = q.get("questions", []) if isinstance(q, dict) else q
+            out.setdefault(quiz_id, mod_skills)
+            for i, item in enumerate(questions):
+                out[item.get("id") or f"{quiz_id}:{i}"] = list(item.get("subskills") or mod_skills)
+    return out
+
 class RecommendationService:
     """
-    Placeholder para futura lógica de recomendação:
-    - Combinar itens 'due' do IntervalScheduler
-    - Ordenar por menor mastery
+    Recomenda itens vencidos por prioridade = atraso relativo × (1 − mastery),
+    com atraso relativo = 1 + (now − next_due) / interval e mastery = média dos
+    subskills do item (0–1). Mantém um heap incremental: `next(k)` custa
+    O(k log n); ratings e mudanças de mastery reempurram só os itens afetados
+    (entradas antigas são descartadas por versão). Como o atraso cresce com o
+    tempo, `refresh()` recalcula o heap (e inclui itens que venceram depois).
     """
-    def recommend(self, due_items, mastery_snapshot):
-        return sorted(due_items, key=lambda x: mastery_snapshot.get(x, 0))
\ No newline at end of file
+    def __init__(self, engine=None, item_subskills: Dict[str, List[str]] | None = None):
+        self.engine = engine
+        self.item_subskills = item_subskills if item_subskills is not None else load_item_subskills()
+        self._heap: list = []
+        self._version: Dict[str, int] = {}
+        self._by_subskill: Dict[str, set] = defaultdict(set)
+        self._due: Dict[str, tuple] = {}  # item -> (interval, last_ts) dos itens no heap
+        self._mastery: Dict[str, float] = {}
+        self._now = 0
+        self._built = False
+
+    def _item_mastery(self, item_id: str, mastery: Dict[str, float]) -> float:
+        skills = self.item_subskills.get(item_id) or []
+        if not skills:
+            return 0.0
+        return sum(mastery.get(s, 0.0) for s in skills) / (100.0 * len(skills))
+
+    def score(self, item_id: str, interval: int, last_ts: int, mastery: Dict[str, float], now: int) -> float:
+        overdue = 1 + (now - (last_ts + interval)) / max(interval, 1)
+        return overdue * (1 - self._item_mastery(item_id, mastery))
+
+    def recommend(self, due_items: Iterable[str], mastery_snapshot: Dict[str, float]) -> List[str]:
+        """Ordena itens por menor mastery dos seus subskills (sem dados de intervalo)."""
+        return sorted(due_items, key=lambda x: self._item_mastery(x, mastery_snapshot))
+
+    def _push(self, item_id: str):
+        interval, last_ts = self._due[item_id]
+        v = self._version.get(item_id, 0) + 1
+        self._version[item_id] = v
+        heapq.heappush(self._heap, (-self.score(item_id, interval, last_ts, self._mastery, self._now), item_id, v))
+        if len(self._heap) > 4 * len(self._due) + 64:
+            # descarta entradas obsoletas acumuladas
+            self._heap = [e for e in self._heap if self._version.get(e[1]) == e[2]]
+            heapq.heapify(self._heap)
+
+    def refresh(self, now: int | None = None):
+        """Reconstrói o heap a partir dos itens vencidos e do snapshot de mastery do engine."""
+        self._now = int(time.time()) if now is None else now
+        items = self.engine.store.due_items(now=self._now)
+        self._due = dict(self.engine.store.get_intervals(items))
+        self._mastery = dict(self.engine.snapshot())
+        self._by_subskill = defaultdict(set)
+        self._version = {}
+        heap = []
+        for item_id, (interval, last_ts) in self._due.items():
+            for s in self.item_subskills.get(item_id) or []:
+                self._by_subskill[s].add(item_id)
+            self._version[item_id] = 1
+            heap.append((-self.score(item_id, interval, last_ts, self._mastery, self._now), item_id, 1))
+        heapq.heapify(heap)
+        self._heap = heap
+        self._built = True
+
+    def on_rated(self, item_id: str, subskill: str | None = None, mastery: float | None = None):
+        """Após um rating: o item sai do heap (reagendado) e itens do subskill são repontuados."""
+        if item_id in self._due:
+            del self._due[item_id]
+            self._version[item_id] = self._version.get(item_id, 0) + 1
+            for s in self.item_subskills.get(item_id) or []:
+                self._by_subskill[s].discard(item_id)
+        if subskill is not None:
+            self._mastery[subskill] = self.engine.mastery(subskill) if mastery is None else mastery
+            for other in self._by_subskill.get(subskill, ()):
+                self._push(other)
+
+    def next(self, k: int = 1) -> List[str]:
+        """Top-k itens por prioridade, sem consumi-los."""
+        if not self._built and self.engine is not None:
+            self.refresh()
+        out, popped = [], []
+        while self._heap and len(out) < k:
+            entry = heapq.heappop(self._heap)
+            if self._version.get(entry[1]) != entry[2]:
+                continue  # entrada obsoleta
+            out.append(entry[1])
+            popped.append(entry)
+        for entry in popped:
+            heapq.heappush(self._heap, entry)
+        return out
@@ -0,0 +1,78 @@
+from __future__ import annotations
+import json
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+from .scheduler import IntervalScheduler
+from mega_common.logging import get_logger
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None
+
+log = get_logger("adaptive.replay")
+
+def load_history(path: str | Path) -> List[dict]:
+    """Lê o histórico de ratings (JSONL: learner_id, item_id, rating, timestamp)."""
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                log.warning("Linha inválida ignorada em %s:%d", path, n)
+    return events
+
+def replay_intervals(events: Iterable[dict], scheduler: IntervalScheduler | None = None
+                     ) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """
+    Recalcula o intervalo final de cada (learner_id, item_id) a partir do
+    histórico completo. Com NumPy, os históricos ficam num vetor contíguo
+    (ordenados por tamanho) e o k-ésimo rating de todos os itens é processado
+    numa única chamada de `compute_many`: O(maior histórico) chamadas vetorizadas.
+    """
+    scheduler = scheduler or IntervalScheduler()
+    per_item: Dict[Tuple[str, str], List[Tuple[int, int]]] = defaultdict(list)
+    for e in events:
+        per_item[(e.get("learner_id") or "", e["item_id"])].append((int(e.get("timestamp") or 0), int(e["rating"])))
+    for hist in per_item.values():
+        hist.sort(key=lambda x: x[0])
+    if np is None or not per_item:
+        out = {}
+        for k, hist in per_item.items():
+            last = 0
+            for _, rating in hist:
+                last = scheduler.compute_interval(last, rating)
+            out[k] = (last, hist[-1][0])
+        return out
+    keys = sorted(per_item, key=lambda k: -len(per_item[k]))
+    lengths = np.fromiter((len(per_item[k]) for k in keys), dtype=np.int64, count=len(keys))
+    total = int(lengths.sum())
+    flat_ts = np.fromiter((ts for k in keys for ts, _ in per_item[k]), dtype=np.int64, count=total)
+    flat_r = np.fromiter((r for k in keys for _, r in per_item[k]), dtype=np.int64, count=total)
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+    last = np.zeros(len(keys), dtype=np.int64)
+    last_ts = np.zeros(len(keys), dtype=np.int64)
+    neg_lengths = -lengths  # crescente: itens com histórico > step formam um prefixo
+    for step in range(int(lengths[0])):
+        m = int(np.searchsorted(neg_lengths, -step, side="left"))
+        idx = starts[:m] + step
+        last[:m] = scheduler.compute_many(last[:m], flat_r[idx])
+        last_ts[:m] = flat_ts[idx]
+    return {k: (int(last[i]), int(last_ts[i])) for i, k in enumerate(keys)}
+
+def replay_into(engine, events: Iterable[dict], scheduler: IntervalScheduler | None = None) -> int:
+    """Reagenda todos os itens do histórico no store do engine (uma gravação em lote por learner)."""
+    by_learner: Dict[str, List[Tuple[str, int, int]]] = defaultdict(list)
+    for (learner, item_id), (interval, ts) in replay_intervals(events, scheduler or engine.scheduler).items():
+        by_learner[learner].append((item_id, interval, ts or None))
+    total = 0
+    for learner, rows in by_learner.items():
+        target = engine.for_learner(learner) if learner else engine
+        target.store.set_intervals(rows)
+        total += len(rows)
+    log.info("Replay: %d itens reagendados em %d learners", total, len(by_learner))
+    return total
@@ -1,8 +1,14 @@
 from __future__ import annotations
 from dataclasses import dataclass
+from typing import Sequence
 from .exceptions import InvalidRatingError
 from mega_common.config import CONFIG
 
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None
+
 @dataclass
 class IntervalResult:
     item_id: str
@@ -33,6 +39,27 @@ class IntervalScheduler:
         base = int(last_interval * self.growth_correct) if last_interval else self.long_interval
         return max(self.long_interval, base)
 
+    def compute_many(self, last_intervals: Sequence[int], ratings: Sequence[int]):
+        """
+        Versão vetorizada de `compute_interval` (NumPy, int64). Sem NumPy
+        instalado cai no laço escalar e devolve uma lista.
+        """
+        if np is None:
+            return [self.compute_interval(last, r) for last, r in zip(last_intervals, ratings, strict=True)]
+        last = np.asarray(last_intervals, dtype=np.int64)
+        r = np.asarray(ratings, dtype=np.int64)
+        if last.shape != r.shape:
+            raise ValueError("last_intervals e ratings com tamanhos diferentes")
+        bad = (r < 0) | (r > 2)
+        if bad.any():
+            raise InvalidRatingError(f"Rating inválido: {int(r[bad][0])}")
+        has_last = last != 0
+        partial = np.where(has_last, (last * self.growth_partial).astype(np.int64), self.med_interval)
+        correct = np.where(has_last, (last * self.growth_correct).astype(np.int64), self.long_interval)
+        return np.select([r == 0, r == 1],
+                         [np.int64(self.min_interval), np.maximum(self.med_interval, partial)],
+                         np.maximum(self.long_interval, correct))
+
     def next(self, item_id: str, last_interval: int, rating: int) -> IntervalResult:
         nxt = self.compute_interval(last_interval, rating)
         return IntervalResult(item_id=item_id, rating=rating, previous_interval=last_interval, next_interval=nxt)
\ No newline at end of file
@@ -1,17 +1,33 @@
 from __future__ import annotations
-import json, time, sqlite3, threading
+import copy, hashlib, json, os, time, sqlite3, threading
+from bisect import bisect_right, insort
 from pathlib import Path
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Iterable
 from mega_common.logging import get_logger
 
 log = get_logger("adaptive.storage")
 
+def _mastery_pct(score_sum: int, attempts: int) -> float:
+    return 0.0 if attempts == 0 else round((score_sum/(2*attempts))*100, 2)
+
+def learner_path(base: Path, learner_id: str | None) -> Path:
+    """
+    Caminho do arquivo de um learner, fragmentado por hash para não acumular
+    milhares de arquivos num único diretório:
+    `.adaptive/data.json` -> `.adaptive/data/<h[:2]>/<h>.json` (h = sha1 do learner).
+    """
+    if not learner_id:
+        return base
+    h = hashlib.sha1(learner_id.encode("utf-8")).hexdigest()
+    return base.with_suffix("") / h[:2] / f"{h}{base.suffix}"
+
 class JSONStorage:
     def __init__(self, path: Path):
         self.path = path
         self._data = {"intervals": {}, "mastery": {}}
         self._loaded = False
         self._lock = threading.RLock()
+        self._due: List[Tuple[int,str]] | None = None  # (next_due, item_id) ordenado, criado sob demanda
 
     def load(self):
         with self._lock:
@@ -31,94 +47,295 @@ class JSONStorage:
             tmp.write_text(json.dumps(self._data, ensure_ascii=False, indent=2), encoding="utf-8")
             tmp.replace(self.path)
 
+    def _persist(self, records: List[Tuple[str,str,list]]):
+        self.save()
+
+    def close(self):
+        pass
+
     def get_interval(self, item_id: str) -> Tuple[int,int]:
         self.load()
         return tuple(self._data["intervals"].get(item_id, [0,0]))  # type: ignore
 
-    def set_interval(self, item_id: str, interval: int):
+    def get_intervals(self, item_ids: Iterable[str]) -> Dict[str, Tuple[int,int]]:
+        self.load()
+        intervals = self._data["intervals"]
+        return {i: tuple(intervals.get(i, [0,0])) for i in item_ids}  # type: ignore
+
+    def _put_interval(self, item_id: str, value: list):
+        if self._due is not None:
+            old = self._data["intervals"].get(item_id)
+            if old:
+                entry = (old[1] + old[0], item_id)
+                i = bisect_right(self._due, entry) - 1
+                if i >= 0 and self._due[i] == entry:
+                    del self._due[i]
+            insort(self._due, (value[1] + value[0], item_id))
+        self._data["intervals"][item_id] = value
+
+    def set_interval(self, item_id: str, interval: int, ts: int | None = None):
+        self.set_intervals([(item_id, interval, ts)])
+
+    def set_intervals(self, rows: Iterable[Tuple[str,int,int | None]]):
+        """Grava vários (item_id, interval, ts) com uma única persistência."""
         self.load()
         with self._lock:
-            self._data["intervals"][item_id] = [interval, int(time.time())]
-            self.save()
+            now = int(time.time())
+            records = []
+            for item_id, interval, ts in rows:
+                value = [interval, now if ts is None else int(ts)]
+                self._put_interval(item_id, value)
+                records.append(("intervals", item_id, value))
+            self._persist(records)
 
-    def due_items(self) -> List[str]:
+    def due_items(self, now: int | None = None, limit: int | None = None, offset: int = 0) -> List[str]:
+        """Itens vencidos (next_due <= now) em ordem de vencimento, paginados."""
         self.load()
-        now = int(time.time())
-        return [k for k,(interval, ts) in self._data["intervals"].items() if now - ts >= interval]
+        now = int(time.time()) if now is None else now
+        with self._lock:
+            if self._due is None:
+                self._due = sorted((ts + interval, k) for k,(interval, ts) in self._data["intervals"].items())
+            end = bisect_right(self._due, now, key=lambda e: e[0])
+            stop = end if limit is None else min(end, offset + limit)
+            return [k for _,k in self._due[offset:stop]]
 
     def update_mastery(self, subskill: str, rating: int):
+        self.update_mastery_many([(subskill, rating)])
+
+    def update_mastery_many(self, rows: Iterable[Tuple[str,int]]):
         self.load()
         with self._lock:
-            score_sum, attempts = self._data["mastery"].get(subskill, [0,0])
-            score_sum += rating
-            attempts += 1
-            self._data["mastery"][subskill] = [score_sum, attempts]
-            self.save()
+            mastery = self._data["mastery"]
+            touched = {}
+            for subskill, rating in rows:
+                score_sum, attempts = mastery.get(subskill, [0,0])
+                mastery[subskill] = touched[subskill] = [score_sum + rating, attempts + 1]
+            self._persist([("mastery", k, v) for k, v in touched.items()])
+
+    def mastery(self, subskill: str) -> float:
+        self.load()
+        return _mastery_pct(*self._data["mastery"].get(subskill, [0,0]))
 
     def mastery_snapshot(self) -> Dict[str,float]:
         self.load()
-        snap = {}
-        for s,(score_sum, attempts) in self._data["mastery"].items():
-            snap[s] = 0.0 if attempts == 0 else round((score_sum/(2*attempts))*100, 2)
-        return snap
+        return {s: _mastery_pct(score_sum, attempts) for s,(score_sum, attempts) in self._data["mastery"].items()}
+
+class JSONLStorage(JSONStorage):
+    """
+    JSONStorage com journal append-only: cada escrita acrescenta um registro
+    compacto ao log (`<path>.wal`) em vez de reescrever o arquivo inteiro.
+    A cada `compact_every` registros o estado é consolidado no snapshot (`path`)
+    e o log é truncado. Registros guardam o valor final (idempotentes), então
+    o replay é seguro mesmo se a compactação for interrompida.
+    """
+    def __init__(self, path: Path, compact_every: int = 1000, fsync: bool = False):
+        super().__init__(path)
+        self.journal_path = path.with_name(path.name + ".wal")
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._journal = None
+        self._pending = 0
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            super().load()
+            dirty = False
+            if self.journal_path.exists():
+                with open(self.journal_path, "r", encoding="utf-8") as f:
+                    for n, line in enumerate(f, 1):
+                        try:
+                            rec = json.loads(line)
+                            self._data[rec["t"]][rec["k"]] = rec["v"]
+                        except Exception:
+                            # linha truncada por crash no meio da escrita
+                            log.warning("Registro inválido ignorado em %s:%d", self.journal_path, n)
+                            dirty = True
+                            continue
+                        self._pending += 1
+            if dirty:
+                # consolida antes de novos appends para não colar na linha truncada
+                self.save()
+
+    def _persist(self, records: List[Tuple[str,str,list]]):
+        if self._journal is None:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write("".join(
+            json.dumps({"t": t, "k": k, "v": v}, ensure_ascii=False, separators=(",", ":")) + "\n"
+            for t, k, v in records))
+        self._journal.flush()
+        if self.fsync:
+            os.fsync(self._journal.fileno())
+        self._pending += len(records)
+        if self._pending >= self.compact_every:
+            self.save()
+
+    def save(self):
+        """Compacta: grava snapshot completo e trunca o journal."""
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self._data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+            tmp.replace(self.path)
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+            self.journal_path.unlink(missing_ok=True)
+            self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
 
 class SQLiteStorage:
-    def __init__(self, db_path: Path):
+    """
+    Uma conexão persistente por thread (pool em `threading.local`), com pragmas
+    aplicados uma única vez e cache de prepared statements do próprio sqlite3.
+    Tabelas chaveadas por (learner, item/subskill); `for_learner` devolve uma
+    visão do mesmo banco que compartilha o pool de conexões.
+    """
+    def __init__(self, db_path: Path, journal_mode: str = "wal", synchronous: str = "normal",
+                 cache_kb: int = 16384, learner_id: str = ""):
         self.db_path = db_path
+        self.journal_mode = journal_mode
+        self.synchronous = synchronous
+        self.cache_kb = cache_kb
+        self.learner_id = learner_id
+        self._owns_pool = True
         self._lock = threading.RLock()
+        self._local = threading.local()
+        self._pool: set[sqlite3.Connection] = set()
         self._init()
 
-    def _conn(self):
-        return sqlite3.connect(self.db_path)
+    def for_learner(self, learner_id: str) -> "SQLiteStorage":
+        view = copy.copy(self)
+        view.learner_id = learner_id
+        view._owns_pool = False
+        return view
+
+    def _conn(self) -> sqlite3.Connection:
+        c = getattr(self._local, "conn", None)
+        if c is None or c not in self._pool:  # conexões de outras threads somem do pool após close()
+            c = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=256)
+            c.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            c.execute(f"PRAGMA synchronous={self.synchronous}")
+            c.execute(f"PRAGMA cache_size=-{int(self.cache_kb)}")
+            c.execute("PRAGMA temp_store=memory")
+            self._local.conn = c
+            with self._lock:
+                self._pool.add(c)
+        return c
+
+    def close(self):
+        if not self._owns_pool:
+            return
+        with self._lock:
+            for c in self._pool:
+                c.close()
+            self._pool.clear()
 
     def _init(self):
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
         with self._conn() as c:
+            # migração de bancos sem a coluna learner (dados vão para o learner padrão "")
+            for table in ("intervals", "mastery"):
+                existing = {row[1] for row in c.execute(f"PRAGMA table_info({table})")}
+                if existing and "learner" not in existing:
+                    c.execute(f"ALTER TABLE {table} RENAME TO {table}_v0")
             c.execute("""CREATE TABLE IF NOT EXISTS intervals(
-                item_id TEXT PRIMARY KEY,
+                learner TEXT NOT NULL DEFAULT '',
+                item_id TEXT NOT NULL,
                 interval INTEGER,
-                last_ts INTEGER
-            )""")
+                last_ts INTEGER,
+                next_due INTEGER,
+                PRIMARY KEY(learner, item_id)
+            ) WITHOUT ROWID""")
+            c.execute("CREATE INDEX IF NOT EXISTS idx_intervals_learner_due ON intervals(learner, next_due)")
             c.execute("""CREATE TABLE IF NOT EXISTS mastery(
-                subskill TEXT PRIMARY KEY,
+                learner TEXT NOT NULL DEFAULT '',
+                subskill TEXT NOT NULL,
                 score_sum INTEGER,
-                attempts INTEGER
-            )""")
+                attempts INTEGER,
+                PRIMARY KEY(learner, subskill)
+            ) WITHOUT ROWID""")
+            old = {row[0] for row in c.execute("SELECT name FROM sqlite_master WHERE type='table' AND name LIKE '%_v0'")}
+            if "intervals_v0" in old:
+                c.execute("""INSERT INTO intervals(learner, item_id, interval, last_ts, next_due)
+                    SELECT '', item_id, interval, last_ts, last_ts + interval FROM intervals_v0""")
+                c.execute("DROP TABLE intervals_v0")
+            if "mastery_v0" in old:
+                c.execute("""INSERT INTO mastery(learner, subskill, score_sum, attempts)
+                    SELECT '', subskill, score_sum, attempts FROM mastery_v0""")
+                c.execute("DROP TABLE mastery_v0")
 
     def get_interval(self, item_id: str):
         with self._conn() as c:
-            cur = c.execute("SELECT interval,last_ts FROM intervals WHERE item_id=?",(item_id,))
+            cur = c.execute("SELECT interval,last_ts FROM intervals WHERE learner=? AND item_id=?",
+                            (self.learner_id, item_id))
             row = cur.fetchone()
             return (0,0) if not row else row
 
-    def set_interval(self, item_id: str, interval: int):
-        import time
-        ts = int(time.time())
-        with self._lock, self._conn() as c:
-            c.execute("REPLACE INTO intervals(item_id, interval, last_ts) VALUES(?,?,?)",(item_id, interval, ts))
+    def get_intervals(self, item_ids: Iterable[str]) -> Dict[str, Tuple[int,int]]:
+        ids = list(dict.fromkeys(item_ids))
+        out = {i: (0,0) for i in ids}
+        c = self._conn()
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start+500]
+            marks = ",".join("?" * len(chunk))
+            for item_id, interval, last_ts in c.execute(
+                    f"SELECT item_id, interval, last_ts FROM intervals WHERE learner=? AND item_id IN ({marks})",
+                    (self.learner_id, *chunk)):
+                out[item_id] = (interval, last_ts)
+        return out
 
-    def due_items(self):
-        import time
+    def set_interval(self, item_id: str, interval: int, ts: int | None = None):
+        self.set_intervals([(item_id, interval, ts)])
+
+    def set_intervals(self, rows: Iterable[Tuple[str,int,int | None]]):
+        """Grava vários (item_id, interval, ts) em uma única transação."""
         now = int(time.time())
-        out=[]
+        params = []
+        for item_id, interval, ts in rows:
+            ts = now if ts is None else int(ts)
+            params.append((self.learner_id, item_id, interval, ts, ts + interval))
+        with self._lock, self._conn() as c:
+            c.executemany("REPLACE INTO intervals(learner, item_id, interval, last_ts, next_due) VALUES(?,?,?,?,?)",
+                          params)
+
+    def due_items(self, now: int | None = None, limit: int | None = None, offset: int = 0):
+        now = int(time.time()) if now is None else now
         with self._conn() as c:
-            for item_id, interval, last_ts in c.execute("SELECT item_id, interval, last_ts FROM intervals"):
-                if now - last_ts >= interval:
-                    out.append(item_id)
-        return out
+            cur = c.execute("""SELECT item_id FROM intervals WHERE learner=? AND next_due <= ?
+                ORDER BY next_due, item_id LIMIT ? OFFSET ?""",
+                            (self.learner_id, now, -1 if limit is None else limit, offset))
+            return [row[0] for row in cur]
 
     def update_mastery(self, subskill: str, rating: int):
+        self.update_mastery_many([(subskill, rating)])
+
+    def update_mastery_many(self, rows: Iterable[Tuple[str,int]]):
+        agg: Dict[str, List[int]] = {}
+        for subskill, rating in rows:
+            acc = agg.setdefault(subskill, [0, 0])
+            acc[0] += rating
+            acc[1] += 1
         with self._lock, self._conn() as c:
-            cur = c.execute("SELECT score_sum, attempts FROM mastery WHERE subskill=?",(subskill,))
-            row = cur.fetchone()
-            score_sum, attempts = row if row else (0,0)
-            score_sum += rating
-            attempts += 1
-            c.execute("REPLACE INTO mastery(subskill,score_sum,attempts) VALUES(?,?,?)",(subskill,score_sum,attempts))
+            c.executemany("""INSERT INTO mastery(learner,subskill,score_sum,attempts) VALUES(?,?,?,?)
+                ON CONFLICT(learner, subskill) DO UPDATE SET score_sum=score_sum+excluded.score_sum,
+                attempts=attempts+excluded.attempts""", [(self.learner_id, k, v[0], v[1]) for k, v in agg.items()])
+
+    def mastery(self, subskill: str) -> float:
+        with self._conn() as c:
+            row = c.execute("SELECT score_sum, attempts FROM mastery WHERE learner=? AND subskill=?",
+                            (self.learner_id, subskill)).fetchone()
+        return _mastery_pct(*row) if row else 0.0
 
     def mastery_snapshot(self):
-        snap={}
         with self._conn() as c:
-            for subskill, score_sum, attempts in c.execute("SELECT subskill,score_sum,attempts FROM mastery"):
-                snap[subskill] = 0.0 if attempts == 0 else round((score_sum/(2*attempts))*100,2)
-        return snap
\ No newline at end of file
+            return {subskill: _mastery_pct(score_sum, attempts)
+                    for subskill, score_sum, attempts in c.execute(
+                        "SELECT subskill,score_sum,attempts FROM mastery WHERE learner=?", (self.learner_id,))}
@@ -0,0 +1,12 @@
+from adaptive.bench import run
+from mega_common.config import CONFIG
+
+def test_bench_reports_all_backends(tmp_path, monkeypatch):
+    history = tmp_path / "history.jsonl"
+    monkeypatch.setattr(CONFIG.adaptive, "history_path", str(history))
+    res = run(learners=2, items=20, ratings=50, queries=5)
+    assert [r["backend"] for r in res] == ["json", "jsonl", "sqlite"]
+    for r in res:
+        assert r["ratings_per_sec"] > 0 and r["disk_bytes"] > 0
+        assert set(r["due"]) == {"p50_ms", "p95_ms", "p99_ms", "max_ms"}
+    assert not history.exists()
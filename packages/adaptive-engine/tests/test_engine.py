@@ -5,4 +5,102 @@ def test_rate_and_mastery_cycle():
     r = eng.rate_item("itemX", 2)
     assert r.next_interval >= 60
     m = eng.update_mastery("skillX", 2)
-    assert m["mastery"] > 0
\ No newline at end of file
+    assert m["mastery"] > 0
+
+def test_rate_many_single_write(tmp_path):
+    for backend, name in (("json", "b.json"), ("jsonl", "b.json"), ("sqlite", "b.db")):
+        eng = AdaptiveEngine(backend=backend, path=str(tmp_path / backend / name))
+        events = [("i1", "s1", 2, 1000), ("i2", "s1", 0, 1000), ("i1", "s2", 2, 1100)]
+        res = eng.rate_many(events)
+        assert [r.previous_interval for r in res] == [0, 0, res[0].next_interval]
+        assert eng.store.get_interval("i1") == (res[2].next_interval, 1100)
+        assert eng.update_mastery_many(events) == {"s1": 50.0, "s2": 100.0}
+
+
+def test_update_mastery_point_lookup(tmp_path):
+    eng = AdaptiveEngine(backend="sqlite", path=str(tmp_path / "m.db"))
+    eng.store.mastery_snapshot = None  # o caminho pontual não pode depender do snapshot
+    assert eng.update_mastery("s", 2)["mastery"] == 100.0
+    assert eng.update_mastery("s", 0)["mastery"] == 50.0
+    assert eng.mastery("s") == eng.store.mastery("s") == 50.0
+
+
+def test_mastery_read_overlapping_write_is_not_cached(tmp_path):
+    eng = AdaptiveEngine(backend="sqlite", path=str(tmp_path / "m.db"))
+    eng.update_mastery("s", 2)
+    eng._mastery_cache.clear()
+    read = eng.store.mastery
+    def racing_read(subskill):
+        value = read(subskill)  # leitura antiga; a escrita chega antes de ir para o cache
+        eng.store.mastery = read
+        eng.update_mastery(subskill, 0)
+        return value
+    eng.store.mastery = racing_read
+    assert eng.mastery("s") == 100.0
+    assert eng.mastery("s") == eng.store.mastery("s") == 50.0
+
+
+def test_for_learner_isolates_and_evicts(tmp_path):
+    for backend, name in (("json", "l.json"), ("sqlite", "l.db")):
+        eng = AdaptiveEngine(backend=backend, path=str(tmp_path / name))
+        eng.max_learners = 2
+        a, b = eng.for_learner("ana"), eng.for_learner("bia")
+        a.rate_item("i1", 2)
+        a.update_mastery("s", 2)
+        assert b.store.get_interval("i1") == (0, 0)
+        assert b.snapshot() == {} and a.snapshot() == {"s": 100.0}
+        assert eng.for_learner("ana") is a
+        eng.for_learner("caio")
+        assert list(eng._learners) == ["ana", "caio"]
+        assert eng.for_learner("ana").store.get_interval("i1")[0] >= 60
+        eng.close()
+
+
+def test_evicted_learner_in_use_keeps_single_store(tmp_path):
+    from adaptive.storage import JSONLStorage
+    eng = AdaptiveEngine(backend="jsonl", path=str(tmp_path / "l.json"))
+    eng.max_learners = 1
+    with eng.pinned("ana") as ana:
+        ana.rate_item("i1", 2)
+        eng.for_learner("bia")  # expulsa "ana" do LRU enquanto ainda está em uso
+        assert ana.store._journal is not None
+        assert eng.for_learner("ana") is ana
+        eng.for_learner("bia")
+        ana.rate_item("i2", 2)
+    eng.for_learner("ana").rate_item("i3", 2)
+    eng.close()
+    fresh = JSONLStorage(ana.store.path)
+    assert all(fresh.get_interval(i)[0] > 0 for i in ("i1", "i2", "i3"))
+
+
+def test_async_engine_serializes_same_item(tmp_path):
+    import asyncio
+    from adaptive.aio import AsyncAdaptiveEngine
+
+    async def run():
+        async with AsyncAdaptiveEngine(backend="sqlite", path=str(tmp_path / "a.db"), max_workers=4) as eng:
+            results = await asyncio.gather(*(eng.rate_item("i", 2, learner_id="ana") for _ in range(10)))
+            await asyncio.gather(*(eng.update_mastery("s", 2, learner_id="ana") for _ in range(5)))
+            return results, await eng.snapshot(learner_id="ana"), await eng.due(learner_id="bia"), eng._locks
+
+    results, snap, due, locks = asyncio.run(run())
+    prevs = sorted(r.previous_interval for r in results)
+    nexts = sorted(r.next_interval for r in results)
+    assert prevs[1:] == nexts[:-1]
+    assert snap == {"s": 100.0} and due == [] and locks == {}
+
+
+def test_async_engine_survives_learner_eviction(tmp_path):
+    import asyncio
+    from adaptive.aio import AsyncAdaptiveEngine
+
+    async def run():
+        async with AsyncAdaptiveEngine(backend="jsonl", path=str(tmp_path / "a.json"), max_workers=4) as eng:
+            eng.engine.max_learners = 1
+            calls = [eng.rate_item("i", 2, learner_id=l) for _ in range(8) for l in ("ana", "bia")]
+            results = await asyncio.gather(*calls)
+            return results[::2], eng.engine.for_learner("ana").store.get_interval("i")[0]
+
+    results, stored = asyncio.run(run())
+    nexts = sorted(r.next_interval for r in results)
+    assert sorted(r.previous_interval for r in results)[1:] == nexts[:-1] and stored == nexts[-1]
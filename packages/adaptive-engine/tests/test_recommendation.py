@@ -0,0 +1,26 @@
+import time
+from adaptive.engine import AdaptiveEngine
+from adaptive import recommendation
+from adaptive.recommendation import RecommendationService, load_item_subskills
+
+def test_load_item_subskills_from_modules(tmp_path, monkeypatch):
+    if recommendation.get_catalog is not None:
+        from content_engine.src import catalog
+        monkeypatch.setattr(catalog, "CATALOG_PATH", tmp_path / "catalog.json")
+    m = load_item_subskills("content/modules")
+    assert m["ecg-basics"] == ["fundamentos-ecg", "morfologia-basica"]
+    assert m["ecg-q1"] == ["ondas"]
+    assert m["ecg-intermediate-quiz1:0"] == ["analise-eixo", "intervalos"]
+
+def test_next_ranks_by_overdue_and_mastery(tmp_path):
+    eng = AdaptiveEngine(backend="sqlite", path=str(tmp_path / "r.db"))
+    now = int(time.time())
+    eng.store.set_intervals([("a", 100, now - 150), ("b", 100, now - 150), ("c", 100, now - 300), ("d", 100, now)])
+    eng.update_mastery("sa", 2)
+    svc = RecommendationService(eng, {"a": ["sa"], "b": ["sb"], "c": ["sb"]})
+    svc.refresh(now)
+    assert svc.next(3) == ["c", "b", "a"]
+    assert svc.next(1) == ["c"]
+    eng.rate_item("c", 2)
+    svc.on_rated("c", "sb", mastery=eng.update_mastery("sb", 2)["mastery"])
+    assert svc.next(5) == ["a", "b"]
@@ -4,4 +4,22 @@ def test_interval_progression():
     s = IntervalScheduler()
     first = s.next_interval("item1", 2)
     second = s.next_interval("item1", 2)
-    assert second >= first
\ No newline at end of file
+    assert second >= first
+
+
+def test_compute_many_matches_scalar():
+    s = IntervalScheduler()
+    last = [0, 0, 0, 45, 45, 45, 200]
+    ratings = [0, 1, 2, 0, 1, 2, 2]
+    assert list(s.compute_many(last, ratings)) == [s.compute_interval(l, r) for l, r in zip(last, ratings)]
+
+
+def test_replay_intervals_matches_sequential():
+    from adaptive.replay import replay_intervals
+    s = IntervalScheduler()
+    events = [{"item_id": "a", "rating": 2, "timestamp": 2}, {"item_id": "a", "rating": 1, "timestamp": 1},
+              {"item_id": "b", "rating": 0, "timestamp": 5}, {"learner_id": "x", "item_id": "a", "rating": 2, "timestamp": 3}]
+    out = replay_intervals(events, s)
+    assert out[("", "a")] == (s.compute_interval(s.compute_interval(0, 1), 2), 2)
+    assert out[("", "b")] == (s.min_interval, 5)
+    assert out[("x", "a")] == (s.long_interval, 3)
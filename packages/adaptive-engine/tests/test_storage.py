@@ -0,0 +1,50 @@
+from adaptive.storage import JSONLStorage
+
+def test_jsonl_journal_replay_and_compaction(tmp_path):
+    p = tmp_path / "data.json"
+    st = JSONLStorage(p, compact_every=3)
+    st.set_interval("a", 60)
+    st.update_mastery("s1", 2)
+    assert st.journal_path.exists() and not p.exists()
+    st.close()
+    # crash simulado: linha truncada no fim do journal
+    with open(st.journal_path, "a", encoding="utf-8") as f:
+        f.write('{"t":"intervals","k":"b"')
+    st2 = JSONLStorage(p, compact_every=3)
+    assert st2.get_interval("a")[0] == 60
+    assert st2.mastery_snapshot() == {"s1": 100.0}
+    assert not st2.journal_path.exists()
+    st2.set_interval("c", 10)
+    st2.set_interval("d", 10)
+    st2.set_interval("e", 10)
+    assert not st2.journal_path.exists()
+    assert JSONLStorage(p).get_interval("e")[0] == 10
+
+def test_sqlite_reuses_connection_per_thread(tmp_path):
+    import threading
+    from adaptive.storage import SQLiteStorage
+    st = SQLiteStorage(tmp_path / "a.db")
+    assert st._conn() is st._conn()
+    assert st._conn().execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    st.set_interval("a", 60)
+    st.update_mastery("s", 1)
+    seen = []
+    t = threading.Thread(target=lambda: seen.append((st._conn(), st.get_interval("a")[0])))
+    t.start(); t.join()
+    assert seen[0][0] is not st._conn() and seen[0][1] == 60
+    assert st.mastery_snapshot() == {"s": 50.0}
+    st.close()
+
+def test_due_items_ordered_and_paginated(tmp_path):
+    import time
+    from adaptive.storage import JSONStorage, SQLiteStorage
+    now = int(time.time())
+    for st in (JSONStorage(tmp_path / "d.json"), SQLiteStorage(tmp_path / "d.db")):
+        st.set_interval("late", 30)
+        st.set_interval("soon", 10)
+        st.set_interval("never", 10_000)
+        assert st.due_items(now=now + 60) == ["soon", "late"]
+        assert st.due_items(now=now + 60, limit=1, offset=1) == ["late"]
+        st.set_interval("soon", 100)
+        assert st.due_items(now=now + 60) == ["late"]
+        assert st.due_items(now=now - 1) == []
@@ -0,0 +1,90 @@
+from __future__ import annotations
+import hashlib, json, re, unicodedata
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Tuple
+from .core import ClinicalCase, compose_case
+
+def read_topics(path: str | Path) -> list[str]:
+    """Um tópico por linha; ignora linhas vazias, comentários (`#`) e repetidos."""
+    lines = (l.strip() for l in Path(path).read_text(encoding="utf-8").splitlines())
+    return list(dict.fromkeys(l for l in lines if l and not l.startswith("#")))
+
+def slug(topic: str) -> str:
+    """Nome de arquivo estável: tópico sem acentos + hash curto (evita colisões)."""
+    ascii_ = unicodedata.normalize("NFKD", topic).encode("ascii", "ignore").decode()
+    base = re.sub(r"[^a-z0-9]+", "-", ascii_.lower()).strip("-")[:60] or "caso"
+    return f"{base}-{hashlib.sha1(topic.encode('utf-8')).hexdigest()[:8]}"
+
+def done_in_jsonl(path: str | Path) -> set[str]:
+    """Tópicos já gravados no JSONL de saída (linha truncada no fim é ignorada)."""
+    done: set[str] = set()
+    p = Path(path)
+    if p.exists():
+        with open(p, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["topic"])
+                except (ValueError, KeyError, TypeError):
+                    continue
+    return done
+
+def open_jsonl(path: str | Path):
+    """Abre o JSONL para acréscimo, descartando uma última linha incompleta (queda no meio da escrita)."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    with open(p, "a+b") as f:
+        end = pos = f.seek(0, 2)
+        while pos > 0:
+            start = max(0, pos - (1 << 16))
+            f.seek(start)
+            cut = f.read(pos - start).rfind(b"\n")
+            if cut >= 0:
+                pos = start + cut + 1
+                break
+            pos = start
+        if pos < end:
+            f.truncate(pos)
+    return open(p, "a", encoding="utf-8")
+
+def done_in_dir(path: str | Path, topics: Iterable[str]) -> set[str]:
+    p = Path(path)
+    return {t for t in topics if (p / f"{slug(t)}.md").exists()}
+
+def generate_batch(topics: Iterable[str], workers: int = 4, skip: set[str] | None = None,
+                   compose: Callable[[str], ClinicalCase] = compose_case
+                   ) -> Iterator[Tuple[str, ClinicalCase | None, str | None]]:
+    """
+    Gera casos com no máximo `workers` em andamento e devolve
+    `(tópico, caso, erro)` na ordem em que terminam, para que o chamador
+    grave cada resultado imediatamente. Tópicos em `skip` (checkpoint) são
+    pulados; a fila é alimentada aos poucos, então a memória não cresce com
+    o número de tópicos. Caso com falhas parciais (`errors`) ou marcado como
+    não seguro pelo fail-safe volta como erro, para não entrar no checkpoint
+    e ser refeito na próxima execução.
+    """
+    skip = skip or set()
+    todo = (t for t in topics if t not in skip)
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="case") as pool:
+        running = {}
+        for topic in todo:
+            running[pool.submit(compose, topic)] = topic
+            if len(running) < max(1, workers):
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield _outcome(running.pop(fut), fut)
+        for fut in as_completed(list(running)):
+            yield _outcome(running.pop(fut), fut)
+
+def _outcome(topic, fut):
+    try:
+        case = fut.result()
+    except Exception as e:
+        return topic, None, f"{type(e).__name__}: {e}"
+    errors = getattr(case, "errors", None)
+    if errors:
+        return topic, case, "caso incompleto: " + "; ".join(f"{k}: {v}" for k, v in errors.items())
+    if getattr(case, "failsafe", {}).get("safe") is False:
+        return topic, case, "caso reprovado pelo fail-safe"
+    return topic, case, None
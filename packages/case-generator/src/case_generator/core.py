@@ -1,7 +1,14 @@
 from __future__ import annotations
-from multi_agent.session import MultiAgentSession
-from dataclasses import dataclass, asdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Generator
+from multi_agent.dag import Task
+from multi_agent.session import LEVELS, MultiAgentSession
+from dataclasses import dataclass, asdict, field
 from mega_common.config import CONFIG
+try:
+    from content_engine.src.pdf_ingest import retrieve
+except ImportError:
+    retrieve = None
 
 @dataclass
 class CaseSection:
@@ -15,6 +22,8 @@ class ClinicalCase:
     explanations: dict[str,str]
     critic: dict
     failsafe: dict
+    context: list[dict] = field(default_factory=list)
+    errors: dict[str,str] = field(default_factory=dict)
 
     def to_markdown(self) -> str:
         lines = [f"# Caso Clínico: {self.topic}", "", "## Plano", *[f"- {p}" for p in self.plan], "", "## Explicações"]
@@ -24,16 +33,108 @@ class ClinicalCase:
         lines.append(f"```json\n{self.critic}\n```\n")
         lines.append("## Fail-Safe")
         lines.append(f"```json\n{self.failsafe}\n```")
+        if self.context:
+            lines.append("\n## Referências")
+            for c in self.context:
+                lines.append(f"- {c['file']} (p. {c['page']}): {c['text'][:200]}")
+        if self.errors:
+            lines.append("\n## Falhas")
+            lines.extend(f"- {k}: {v}" for k, v in self.errors.items())
         return "\n".join(lines)
 
     def to_dict(self):
         return asdict(self)
 
+def _session():
+    cfg = CONFIG.case_generator
+    return MultiAgentSession(max_workers=cfg.max_workers, timeout=cfg.agent_timeout_seconds or None)
+
+def _tasks(sess: MultiAgentSession, topic: str, explain: bool, plan_hook=None) -> dict[str, Task]:
+    cfg = CONFIG.case_generator
+    def plan():
+        out = sess.run_plan(topic=topic)["plan"]
+        if plan_hook:
+            plan_hook(out)
+        return out
+    tasks = {"plan": Task(plan)}
+    if explain:
+        tasks.update({f"explain:{lvl}": t for lvl, t in sess.explain_tasks(topic).items()})
+    if cfg.include_critic:
+        tasks["critic"] = Task(lambda plan: sess.critic.act(passage=" ".join(plan)), deps=("plan",))
+    if cfg.include_failsafe:
+        tasks["failsafe"] = Task(lambda plan: sess.failsafe.act(answer=" ".join(plan)), deps=("plan",))
+    if retrieve and cfg.context_chunks:
+        tasks["context"] = Task(lambda: retrieve(topic, cfg.context_chunks))
+    return tasks
+
+def _assemble(topic: str, res: dict, errors: dict, explanations: dict | None = None) -> ClinicalCase:
+    if "plan" in errors:
+        raise RuntimeError(f"Falha no plano de '{topic}': {errors['plan']}")
+    if explanations is None:
+        explanations = {lvl: res[f"explain:{lvl}"] for lvl in LEVELS if f"explain:{lvl}" in res}
+    critic = res.get("critic", {"error": errors["critic"]} if "critic" in errors else {})
+    failsafe = res.get("failsafe", {"moderated": True, "safe": False, "error": errors["failsafe"]}
+                       if "failsafe" in errors else {})
+    return ClinicalCase(topic=topic, plan=res["plan"], explanations=explanations, critic=critic,
+                        failsafe=failsafe, context=res.get("context", []), errors=errors)
+
 def compose_case(topic: str) -> ClinicalCase:
+    """
+    Monta o caso executando os agentes como um DAG: plano, explicações e
+    recuperação de contexto são independentes; crítica e fail-safe dependem
+    do plano. Com `max_workers > 1` as chamadas independentes rodam em
+    paralelo, cada uma limitada a `agent_timeout_seconds`. Falhas parciais
+    vão para `errors`; um fail-safe que falhou marca o caso como não seguro.
+    """
+    sess = _session()
+    res, errors = sess.run(_tasks(sess, topic, CONFIG.case_generator.include_explainer))
+    return _assemble(topic, res, errors)
+
+def compose_case_stream(topic: str) -> Generator[str, None, ClinicalCase]:
+    """
+    Versão em streaming de `compose_case`: emite o Markdown do caso em
+    pedaços. Plano, crítica, fail-safe e contexto rodam em segundo plano; o
+    plano sai assim que fica pronto e as explicações são repassadas token a
+    token pelo `ExplainerAgent.act_stream` (sem o timeout por chamada); uma
+    explicação que falha no meio fica com o texto parcial e um aviso. O
+    restante é emitido ao final e o texto completo é igual a `to_markdown()`;
+    o retorno do gerador é o `ClinicalCase`.
+    """
     cfg = CONFIG.case_generator
-    sess = MultiAgentSession()
-    plan = sess.run_plan(topic=topic)["plan"]
-    explanations = sess.explain_levels(topic) if cfg.include_explainer else {}
-    critic = sess.critic.act(passage=" ".join(plan)) if cfg.include_critic else {}
-    failsafe = sess.failsafe.act(answer=" ".join(plan)) if cfg.include_failsafe else {}
-    return ClinicalCase(topic=topic, plan=plan, explanations=explanations, critic=critic, failsafe=failsafe)
\ No newline at end of file
+    sess = _session()
+    plan_ready: Future = Future()
+    bg = ThreadPoolExecutor(max_workers=1, thread_name_prefix="case-dag")
+    # o plano pode falhar/expirar: o fim do DAG libera a espera com None
+    release = lambda plan: plan_ready.done() or plan_ready.set_result(plan)
+    job = bg.submit(sess.run, _tasks(sess, topic, False, plan_hook=release))
+    job.add_done_callback(lambda _: release(None))
+    emitted, explanations, stream_errors = [], {}, {}
+    def emit(text):
+        emitted.append(text)
+        return text
+    try:
+        plan = plan_ready.result()
+        if plan is not None:
+            yield emit("\n".join([f"# Caso Clínico: {topic}", "", "## Plano", *[f"- {p}" for p in plan], "",
+                                  "## Explicações"]) + "\n")
+            for lvl in LEVELS if cfg.include_explainer else ():
+                yield emit(f"### {lvl.capitalize()}\n")
+                parts = []
+                try:
+                    for delta in sess.explainer.act_stream(concept=topic, level=lvl):
+                        parts.append(delta)
+                        yield emit(delta)
+                except Exception as e:
+                    # o que já saiu fica no caso, seguido de um aviso visível
+                    err = stream_errors[f"explain:{lvl}"] = f"{type(e).__name__}: {e}"
+                    parts.append(("\n\n" if parts else "") + f"> [explicação interrompida: {err}]")
+                    yield emit(parts[-1])
+                explanations[lvl] = "".join(parts)
+                yield emit("\n\n")
+        res, errors = job.result()
+    finally:
+        bg.shutdown(wait=False)
+    case = _assemble(topic, res, {**errors, **stream_errors}, explanations)
+    full, sent = case.to_markdown(), "".join(emitted)
+    yield full[len(sent):] if full.startswith(sent) else "\n\n" + full
+    return case
@@ -0,0 +1,43 @@
+import json, threading, time
+from case_generator.batch import done_in_jsonl, generate_batch, open_jsonl, read_topics, slug
+
+def test_generate_batch_bounds_concurrency_and_skips_done():
+    lock, state = threading.Lock(), {"now": 0, "max": 0}
+    def compose(topic):
+        with lock:
+            state["now"] += 1
+            state["max"] = max(state["max"], state["now"])
+        time.sleep(0.01)
+        with lock:
+            state["now"] -= 1
+        if topic == "t3":
+            raise RuntimeError("falhou")
+        return topic.upper()
+    out = list(generate_batch([f"t{i}" for i in range(20)], workers=3, skip={"t0", "t1"}, compose=compose))
+    assert state["max"] <= 3 and len(out) == 18
+    assert {t for t, _, err in out if err} == {"t3"}
+    assert dict((t, c) for t, c, err in out if not err)["t9"] == "T9"
+
+def test_incomplete_or_unsafe_cases_are_failures():
+    from case_generator.core import ClinicalCase
+    def compose(topic):
+        errors = {"critic": "TimeoutError: llm"} if topic == "parcial" else {}
+        return ClinicalCase(topic=topic, plan=["p"], explanations={}, critic={}, context=[], errors=errors,
+                            failsafe={"moderated": True, "safe": topic != "inseguro"})
+    out = dict((t, err) for t, _, err in generate_batch(["ok", "parcial", "inseguro"], compose=compose))
+    assert out == {"ok": None, "parcial": "caso incompleto: critic: TimeoutError: llm",
+                   "inseguro": "caso reprovado pelo fail-safe"}
+
+def test_jsonl_checkpoint_drops_truncated_tail(tmp_path):
+    path = tmp_path / "cases.jsonl"
+    path.write_text(json.dumps({"topic": "ECG"}) + "\n" + '{"topic": "Arr')
+    assert done_in_jsonl(path) == {"ECG"}
+    with open_jsonl(path) as f:
+        f.write(json.dumps({"topic": "Novo"}) + "\n")
+    assert done_in_jsonl(path) == {"ECG", "Novo"} and len(path.read_text().splitlines()) == 2
+
+def test_read_topics_and_slug(tmp_path):
+    p = tmp_path / "topics.txt"
+    p.write_text("ECG\n# comentário\n\nInsuficiência cardíaca\nECG\n", encoding="utf-8")
+    assert read_topics(p) == ["ECG", "Insuficiência cardíaca"]
+    assert slug("Insuficiência cardíaca").startswith("insuficiencia-cardiaca-") and slug("a/b") != slug("a b")
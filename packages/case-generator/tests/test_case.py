@@ -3,4 +3,48 @@ from case_generator.core import compose_case
 def test_compose_case():
     c = compose_case("ECG")
     assert c.topic == "ECG"
-    assert isinstance(c.plan, list)
\ No newline at end of file
+    assert isinstance(c.plan, list)
+
+
+def test_compose_case_failsafe_error_marks_unsafe(monkeypatch):
+    from multi_agent.failsafe import FailSafeAgent
+    def boom(self, answer):
+        raise TimeoutError("llm")
+    monkeypatch.setattr(FailSafeAgent, "act", boom)
+    c = compose_case("ECG")
+    assert set(c.explanations) == {"basico", "intermediario", "avancado"} and c.critic["ok"]
+    assert c.failsafe["safe"] is False and c.errors == {"failsafe": "TimeoutError: llm"}
+    assert "## Falhas" in c.to_markdown()
+
+
+def _drain(stream):
+    parts = []
+    try:
+        while True:
+            parts.append(next(stream))
+    except StopIteration as stop:
+        return parts, stop.value
+
+
+def test_compose_case_stream_matches_markdown():
+    from case_generator.core import compose_case_stream
+    parts, case = _drain(compose_case_stream("ECG"))
+    assert parts[0].startswith("# Caso Clínico: ECG") and len(parts) > 5
+    assert "".join(parts) == case.to_markdown() == compose_case("ECG").to_markdown()
+
+
+def test_compose_case_stream_explainer_failure_keeps_prefix(monkeypatch):
+    from case_generator.core import compose_case_stream
+    from multi_agent.explainer import ExplainerAgent
+    def act_stream(self, concept, level="basico"):
+        yield "começo "
+        if level == "intermediario":
+            raise ConnectionError("queda")
+        yield "fim"
+    monkeypatch.setattr(ExplainerAgent, "act_stream", act_stream)
+    parts, case = _drain(compose_case_stream("ECG"))
+    md = "".join(parts)
+    assert md == case.to_markdown() and md.count("# Caso Clínico") == 1
+    assert case.explanations["intermediario"] == "começo \n\n> [explicação interrompida: ConnectionError: queda]"
+    assert case.explanations["avancado"] == "começo fim"
+    assert case.errors == {"explain:intermediario": "ConnectionError: queda"}
@@ -1,15 +1,25 @@
 import typer, json
+from functools import lru_cache
 from adaptive.engine import AdaptiveEngine
 from mega_common.config import CONFIG
 from adaptive.exceptions import InvalidRatingError
+from adaptive.replay import load_history, replay_into
+try:
+    from content_engine.src.item_bank import ItemBank
+except ImportError:
+    ItemBank = None
 
 adaptive_app = typer.Typer(help="Comandos do motor adaptativo persistente")
-_engine = AdaptiveEngine()
+
+@lru_cache(maxsize=1)
+def _engine() -> AdaptiveEngine:
+    # construído só quando um comando roda (abre/cria o storage)
+    return AdaptiveEngine()
 
 @adaptive_app.command("rate")
 def rate(item_id: str, rating: int = typer.Argument(..., min=0, max=2)):
     try:
-        result = _engine.rate_item(item_id, rating)
+        result = _engine().rate_item(item_id, rating)
         payload = {
             "item": result.item_id,
             "previous_interval": result.previous_interval,
@@ -23,13 +33,31 @@ def rate(item_id: str, rating: int = typer.Argument(..., min=0, max=2)):
 
 @adaptive_app.command("mastery")
 def mastery(subskill: str, rating: int):
-    resp = _engine.update_mastery(subskill, rating)
+    resp = _engine().update_mastery(subskill, rating)
     typer.echo(json.dumps(resp, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
 
 @adaptive_app.command("due")
-def due():
-    typer.echo(json.dumps({"due": _engine.due()}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
+def due(limit: int = typer.Option(None, help="Máximo de itens"), offset: int = typer.Option(0, help="Itens a pular")):
+    typer.echo(json.dumps({"due": _engine().due(limit=limit, offset=offset)}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
 
 @adaptive_app.command("snapshot")
 def snapshot():
-    typer.echo(json.dumps({"mastery": _engine.snapshot()}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
\ No newline at end of file
+    typer.echo(json.dumps({"mastery": _engine().snapshot()}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
+
+@adaptive_app.command("replay")
+def replay(history: str = typer.Argument(..., help="Histórico de ratings (JSONL)")):
+    """Reagenda todos os itens do histórico com os fatores atuais de mega.config.yaml."""
+    n = replay_into(_engine(), load_history(history))
+    typer.echo(json.dumps({"rescheduled": n}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
+
+@adaptive_app.command("next")
+def next_items(k: int = typer.Option(5, help="Itens a devolver"),
+               subskill: str = typer.Option(None, help="Filtra por subskill"),
+               module: str = typer.Option(None, help="Filtra por módulo")):
+    """Próximos itens do banco: vencidos primeiro, depois novos ponderados por mastery."""
+    if ItemBank is None:
+        typer.echo("content-engine não disponível")
+        raise typer.Exit(1)
+    bank = ItemBank.load()
+    items = [bank.question(i) for i in bank.adaptive_sample(_engine(), k, subskill=subskill, module=module)]
+    typer.echo(json.dumps({"items": items}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
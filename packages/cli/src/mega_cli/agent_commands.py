@@ -15,9 +15,20 @@ def plan(topic: str):
     typer.echo(sess.run_plan(topic))
 
 @agent_app.command("explain")
-def explain(concept: str):
+def explain(concept: str, stream: bool = typer.Option(True, help="Imprime os tokens à medida que chegam")):
     if not MultiAgentSession:
         typer.echo("Multi-agent package não instalado.")
         raise typer.Exit(1)
     sess = MultiAgentSession()
-    typer.echo(sess.explain_levels(concept))
\ No newline at end of file
+    if not stream:
+        typer.echo(sess.explain_levels(concept))
+        return
+    current = None
+    for lvl, delta in sess.explain_stream(concept):
+        if lvl != current:
+            if current is not None:
+                typer.echo()
+            typer.echo(f"[{lvl}] ", nl=False)
+            current = lvl
+        typer.echo(delta, nl=False)
+    typer.echo()
\ No newline at end of file
@@ -0,0 +1,13 @@
+import typer, json
+from mega_common.config import CONFIG
+
+bench_app = typer.Typer(help="Benchmarks reprodutíveis")
+
+@bench_app.command("adaptive")
+def adaptive(backend: list[str] = typer.Option(None, help="Backends (json, jsonl, sqlite); padrão: todos"),
+             learners: int = typer.Option(10), items: int = typer.Option(1000), ratings: int = typer.Option(5000),
+             subskills: int = typer.Option(20), queries: int = typer.Option(200), seed: int = typer.Option(0)):
+    from adaptive.bench import run
+    res = run(backend or None, learners=learners, items=items, ratings=ratings, subskills=subskills,
+              queries=queries, seed=seed)
+    typer.echo(json.dumps(res, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
@@ -1,11 +1,19 @@
 import typer, json
-from case_generator.core import compose_case
+from pathlib import Path
+from case_generator.core import compose_case, compose_case_stream
+from case_generator.batch import done_in_dir, done_in_jsonl, generate_batch, open_jsonl, read_topics, slug
 from mega_common.config import CONFIG
 
 case_app = typer.Typer(help="Geração de casos clínicos (robusto)")
 
 @case_app.command("generate")
-def generate(topic: str, markdown: bool = typer.Option(False, help="Saída em Markdown")):
+def generate(topic: str, markdown: bool = typer.Option(False, help="Saída em Markdown"),
+             stream: bool = typer.Option(False, help="Markdown em streaming, impresso à medida que é gerado")):
+    if stream:
+        for delta in compose_case_stream(topic):
+            typer.echo(delta, nl=False)
+        typer.echo()
+        return
     case = compose_case(topic)
     if markdown:
         typer.echo(case.to_markdown())
@@ -13,4 +21,44 @@ def generate(topic: str, markdown: bool = typer.Option(False, help="Saída em Ma
         if CONFIG.cli.json_pretty:
             typer.echo(json.dumps(case.to_dict(), ensure_ascii=False, indent=2))
         else:
-            typer.echo(json.dumps(case.to_dict(), ensure_ascii=False))
\ No newline at end of file
+            typer.echo(json.dumps(case.to_dict(), ensure_ascii=False))
+
+@case_app.command("batch")
+def batch(topics_file: str = typer.Argument(..., help="Arquivo com um tópico por linha"),
+          out: str = typer.Option("cases.jsonl", help="JSONL de saída (também é o checkpoint)"),
+          markdown_dir: str = typer.Option(None, help="Grava um .md por tópico neste diretório em vez do JSONL"),
+          workers: int = typer.Option(CONFIG.case_generator.batch_workers, "--workers", "-w", help="Casos em paralelo")):
+    """
+    Gera casos em lote; cada caso é gravado assim que termina e tópicos já
+    gravados são pulados. Casos incompletos não são gravados e são refeitos
+    na próxima execução.
+    """
+    topics = read_topics(topics_file)
+    skip = done_in_dir(markdown_dir, topics) if markdown_dir else done_in_jsonl(out)
+    sink = None if markdown_dir else open_jsonl(out)
+    if markdown_dir:
+        Path(markdown_dir).mkdir(parents=True, exist_ok=True)
+    ok = failed = 0
+    try:
+        for topic, case, error in generate_batch(topics, workers=workers, skip=skip):
+            if error:
+                failed += 1
+                typer.echo(f"[erro] {topic}: {error}", err=True)
+                continue
+            if sink:
+                sink.write(json.dumps(case.to_dict(), ensure_ascii=False) + "\n")
+                sink.flush()
+            else:
+                dest = Path(markdown_dir) / f"{slug(topic)}.md"
+                tmp = dest.with_suffix(".md.tmp")
+                tmp.write_text(case.to_markdown(), encoding="utf-8")
+                tmp.replace(dest)
+            ok += 1
+            typer.echo(f"[{ok + len(skip)}/{len(topics)}] {topic}", err=True)
+    finally:
+        if sink:
+            sink.close()
+    typer.echo(json.dumps({"generated": ok, "skipped": len(skip), "failed": failed}, ensure_ascii=False,
+                          indent=2 if CONFIG.cli.json_pretty else None))
+    if failed:
+        raise typer.Exit(1)
@@ -0,0 +1,23 @@
+import importlib
+import typer
+from typer.core import TyperGroup
+
+class LazyGroup(TyperGroup):
+    """
+    Grupo Click cujos sub-apps Typer só são importados quando invocados.
+    Subclasses declaram `lazy_subcommands = {nome: "modulo:atributo"}`.
+    """
+    lazy_subcommands: dict[str, str] = {}
+
+    def list_commands(self, ctx):
+        base = super().list_commands(ctx)
+        return base + [n for n in self.lazy_subcommands if n not in base]
+
+    def get_command(self, ctx, name):
+        cmd = super().get_command(ctx, name)
+        if cmd is None and name in self.lazy_subcommands:
+            module, attr = self.lazy_subcommands[name].split(":")
+            cmd = typer.main.get_group(getattr(importlib.import_module(module), attr))
+            cmd.name = name
+            self.add_command(cmd, name)
+        return cmd
@@ -1,43 +1,47 @@
-import typer, json, os, yaml
+import typer, json, os
 from mega_common.config import CONFIG
-from .adaptive_commands import adaptive_app
-from .agent_commands import agent_app
-from .case_commands import case_app
-from .pdf_commands import pdf_app
+from .lazy import LazyGroup
 
-app = typer.Typer(help="CLI MEGA (robusta)")
-BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../../.."))
-MODULES_DIR = os.path.join(BASE, "content", "modules")
+class MegaGroup(LazyGroup):
+    # sub-apps importados sob demanda: `mega version` não carrega engine, PyPDF2 nem agentes
+    lazy_subcommands = {
+        "adaptive": "mega_cli.adaptive_commands:adaptive_app",
+        "agent": "mega_cli.agent_commands:agent_app",
+        "bench": "mega_cli.bench_commands:bench_app",
+        "case": "mega_cli.case_commands:case_app",
+        "pdf": "mega_cli.pdf_commands:pdf_app",
+    }
+
+app = typer.Typer(help="CLI MEGA (robusta)", cls=MegaGroup)
 
 @app.command()
 def version():
     typer.echo("mega-cli 0.2.0")
 
 @app.command()
-def ingest():
+def ingest(rebuild: bool = typer.Option(False, "--rebuild", help="Recompila o catálogo ignorando o cache")):
+    from content_engine.src.catalog import MODULES_DIR, load_catalog
     if not os.path.isdir(MODULES_DIR):
         typer.echo("Nenhum módulo encontrado")
         raise typer.Exit(code=0)
-    mods = []
-    for d in sorted(os.listdir(MODULES_DIR)):
-        mpath = os.path.join(MODULES_DIR, d, "manifest.yaml")
-        if os.path.isfile(mpath):
-            with open(mpath, 'r') as f:
-                try:
-                    data = yaml.safe_load(f)
-                    mods.append({"id": data.get("id"), "title": data.get("title"), "version": data.get("version")})
-                except Exception as e:
-                    typer.echo(f"Erro lendo {mpath}: {e}")
+    cat = load_catalog(MODULES_DIR, rebuild=rebuild)
+    mods = [{"id": m.get("id"), "title": m.get("title"), "version": m.get("version")} for m in cat.modules()]
     typer.echo(json.dumps(mods, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
 
+@app.command()
+def validate():
+    """Valida o esquema de todas as questões (sai com 1 se houver erros)."""
+    from content_engine.src.catalog import MODULES_DIR, load_catalog
+    cat = load_catalog(MODULES_DIR)
+    invalid = cat.data["invalid"]
+    typer.echo(json.dumps({"items": len(cat.data["items"]), "invalid": invalid},
+                          ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
+    if invalid:
+        raise typer.Exit(1)
+
 @app.command()
 def draft_case(topic: str = typer.Argument(..., help="Tópico para caso clínico (placeholder)")):
     typer.echo(json.dumps({"topic": topic, "status": "placeholder"}, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
 
-app.add_typer(adaptive_app, name="adaptive")
-app.add_typer(agent_app, name="agent")
-app.add_typer(case_app, name="case")
-app.add_typer(pdf_app, name="pdf")
-
 if __name__ == "__main__":
     app()
\ No newline at end of file
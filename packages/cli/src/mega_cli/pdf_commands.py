@@ -1,16 +1,29 @@
 import typer, json
 from mega_common.config import CONFIG
 try:
-    from content_engine.src.pdf_ingest import batch_index
+    from content_engine.src.pdf_ingest import batch_index, search as pdf_search, semantic_search
 except ImportError:
-    batch_index = None
+    batch_index = pdf_search = semantic_search = None
 
 pdf_app = typer.Typer(help="Ingestão de PDFs (robusta)")
 
+def _progress(done: int, total: int, path):
+    typer.echo(f"[{done}/{total}] {path}", err=True)
+
 @pdf_app.command("ingest")
-def ingest(target: str):
+def ingest(target: str, workers: int = typer.Option(1, "--workers", "-w", help="Processos de extração em paralelo"),
+           force: bool = typer.Option(False, help="Reextrai mesmo arquivos inalterados")):
     if not batch_index:
         typer.echo("Dependências de PDF não instaladas. pip install PyPDF2")
         raise typer.Exit(1)
-    res = batch_index(target)
-    typer.echo(json.dumps(res, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
\ No newline at end of file
+    res = batch_index(target, workers=workers, progress=_progress, force=force)
+    typer.echo(json.dumps(res, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
+
+@pdf_app.command("search")
+def search(query: str, k: int = typer.Option(10, help="Número de resultados"),
+           semantic: bool = typer.Option(False, help="Busca vetorial por trechos em vez de BM25 por página")):
+    if not pdf_search:
+        typer.echo("Dependências de PDF não instaladas. pip install PyPDF2")
+        raise typer.Exit(1)
+    res = semantic_search(query, k) if semantic else pdf_search(query, k)
+    typer.echo(json.dumps(res, ensure_ascii=False, indent=2 if CONFIG.cli.json_pretty else None))
@@ -0,0 +1,22 @@
+import os, re, subprocess, sys
+
+# orçamento de importação de `mega version` (µs, cumulativo de mega_cli.main, inclui typer)
+STARTUP_BUDGET_US = 400_000
+HEAVY = ("adaptive", "PyPDF2", "numpy", "multi_agent", "case_generator", "content_engine")
+
+def _importtime(*args):
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-m", "mega_cli.main", *args],
+                          capture_output=True, text=True, env=os.environ.copy(), check=True)
+    rows = {}
+    for line in proc.stderr.splitlines():
+        m = re.match(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)", line)
+        if m:
+            rows[m.group(4)] = int(m.group(2))
+    return proc.stdout, rows
+
+def test_version_skips_heavy_imports_and_stays_under_budget():
+    out, rows = _importtime("version")
+    assert out.strip() == "mega-cli 0.2.0"
+    assert not [m for m in rows if m.split(".")[0] in HEAVY]
+    total = sum(us for mod, us in rows.items() if "." not in mod)  # módulos de topo já são cumulativos
+    assert total < STARTUP_BUDGET_US, f"mega version importou em {total/1000:.1f} ms"
@@ -16,13 +16,37 @@ class AdaptiveConfig:
     growth_factor_partial: float = 1.4
     growth_factor_correct: float = 2.2
     mastery_scale: int = 2
+    journal_compact_every: int = 1000
+    journal_fsync: bool = False
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_cache_kb: int = 16384
+    learner_cache_size: int = 1024
+    history_path: str = ""
+    async_workers: int = 8
 
 @dataclass
 class PDFConfig:
     index_path: str = "data/pdf_index.json"
     preview_chars: int = 500
+    checkpoint_every: int = 50
+    text_dir: str = "data/pdf_text"
+    search_index_path: str = "data/pdf_search.db"
+    chunk_chars: int = 800
+    chunk_overlap: int = 200
+    vector_index: bool = False
+    vector_dir: str = "data/pdf_vectors"
+    vector_dim: int = 256
+    vector_nprobe: int = 8
+    vector_ivf_min: int = 4096
+    embedding_model: str = ""
     allowed_extensions: list[str] = field(default_factory=lambda: [".pdf"])
 
+@dataclass
+class ContentConfig:
+    modules_dir: str = "content/modules"
+    catalog_path: str = "data/content_catalog.json"
+
 @dataclass
 class LoggingConfig:
     level: str = "INFO"
@@ -38,12 +62,17 @@ class CaseGenConfig:
     include_explainer: bool = True
     include_critic: bool = True
     include_failsafe: bool = True
+    context_chunks: int = 3
+    max_workers: int = 6
+    agent_timeout_seconds: float = 60.0
+    batch_workers: int = 4
 
 @dataclass
 class MegaConfig:
     version: str = "0.1.0"
     adaptive: AdaptiveConfig = field(default_factory=AdaptiveConfig)
     pdf: PDFConfig = field(default_factory=PDFConfig)
+    content: ContentConfig = field(default_factory=ContentConfig)
     logging: LoggingConfig = field(default_factory=LoggingConfig)
     cli: CLIConfig = field(default_factory=CLIConfig)
     case_generator: CaseGenConfig = field(default_factory=CaseGenConfig)
@@ -58,6 +87,7 @@ class MegaConfig:
             version=data.get("version", "0.1.0"),
             adaptive=AdaptiveConfig(**data.get("adaptive", {})),
             pdf=PDFConfig(**data.get("pdf", {})),
+            content=ContentConfig(**data.get("content", {})),
             logging=LoggingConfig(**data.get("logging", {})),
             cli=CLIConfig(**data.get("cli", {})),
             case_generator=CaseGenConfig(**data.get("case_generator", {})),
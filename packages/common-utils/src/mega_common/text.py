@@ -0,0 +1,8 @@
+import re
+from typing import Iterator
+
+_TOKEN = re.compile(r"\s*\S+\s*")
+
+def tokens(text: str) -> Iterator[str]:
+    """Fatia um texto pronto em pedaços palavra+espaço (simula tokens para streaming)."""
+    return (m.group() for m in _TOKEN.finditer(text))
@@ -0,0 +1,216 @@
+from __future__ import annotations
+import json, os
+from pathlib import Path
+from typing import Any, Dict, List
+from mega_common.config import CONFIG
+from mega_common.logging import get_logger
+
+log = get_logger("content.catalog")
+
+_REPO_ROOT = Path(__file__).resolve().parents[3]
+
+def _modules_dir() -> Path:
+    # resolvido uma vez para CLI, ItemBank e recomendação: o cache do catálogo
+    # guarda o diretório absoluto e seria invalidado por caminhos diferentes
+    p = Path(CONFIG.content.modules_dir)
+    if not p.is_absolute() and not p.is_dir():
+        p = _REPO_ROOT / p  # relativo ao cwd; fora da raiz do repo, cai no diretório do repositório
+    return p.resolve()
+
+MODULES_DIR = _modules_dir()
+CATALOG_PATH = Path(CONFIG.content.catalog_path)
+# versão do formato compartilhada com apps/web/lib/loadModules.ts
+CATALOG_VERSION = json.loads(Path(__file__).with_name("catalog_version.json").read_text(encoding="utf-8"))["version"]
+
+def _stat(path: Path):
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+def _watched(modules_dir: Path) -> List[Path]:
+    """
+    Caminhos cujo mtime invalida o catálogo: diretórios (entradas criadas ou
+    removidas), manifests e quizzes. O conteúdo das lições não é compilado,
+    então basta o mtime de `lessons/`.
+    """
+    paths = [modules_dir]
+    for d in sorted(p for p in modules_dir.iterdir() if p.is_dir()):
+        paths += [d, d / "manifest.yaml", d / "lessons", d / "quizzes"]
+        paths += sorted((d / "quizzes").glob("*.json"))
+    return paths
+
+def _stamp(modules_dir: Path, paths) -> Dict[str, Any]:
+    return {os.path.relpath(p, modules_dir): _stat(p) for p in paths}
+
+def _read_json(path: Path):
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception as e:
+        log.warning("Erro lendo %s: %s", path, e)
+        return None
+
+def validate_question(item) -> List[str]:
+    """
+    Erros de esquema de uma questão. Aceita os dois formatos do repositório:
+    `{"q", "a"}` (resposta aberta) e `{"stem", "options", "answer"}` (mcq).
+    """
+    if not isinstance(item, dict):
+        return ["questão não é um objeto"]
+    errors = []
+    if not isinstance(item.get("stem", item.get("q")), str) or not item.get("stem", item.get("q")):
+        errors.append("sem enunciado (stem/q)")
+    answer = item.get("answer", item.get("a"))
+    if answer is None:
+        errors.append("sem resposta (answer/a)")
+    options = item.get("options")
+    if item.get("type") == "mcq" or options is not None:
+        if not isinstance(options, list) or len(options) < 2:
+            errors.append("mcq requer ao menos 2 opções")
+        elif answer is not None and not (isinstance(answer, int) and 0 <= answer < len(options)):
+            errors.append(f"answer fora das opções: {answer!r}")
+    skills = item.get("subskills")
+    if skills is not None and not (isinstance(skills, list) and all(isinstance(x, str) for x in skills)):
+        errors.append("subskills deve ser lista de strings")
+    if "id" in item and not isinstance(item["id"], str):
+        errors.append("id deve ser string")
+    return errors
+
+def compile_catalog(modules_dir: str | Path = MODULES_DIR) -> Dict[str, Any]:
+    """
+    Lê todos os manifests e quizzes uma única vez e devolve o catálogo
+    compilado: módulos (manifest + lições + quizzes), quizzes (módulo e ids
+    dos itens), itens (módulo, quiz, subskills) e subskill -> módulos.
+    Questões sem `subskills` herdam as do manifest; itens sem `id` recebem
+    `<quiz_id>:<índice>`. Questões fora do esquema ou com id repetido vão
+    para `invalid` (item -> erros).
+    """
+    import yaml
+    modules_dir = Path(modules_dir)
+    paths = _watched(modules_dir) if modules_dir.is_dir() else [modules_dir]
+    modules: Dict[str, Any] = {}
+    quizzes: Dict[str, Any] = {}
+    items: Dict[str, Any] = {}
+    subskills: Dict[str, List[str]] = {}
+    invalid: Dict[str, List[str]] = {}
+    for manifest in (p for p in paths if p.name == "manifest.yaml" and p.is_file()):
+        d = manifest.parent
+        try:
+            data = yaml.safe_load(manifest.read_text(encoding="utf-8")) or {}
+        except Exception as e:
+            log.warning("Erro lendo %s: %s", manifest, e)
+            continue
+        mod_id = data.get("id") or d.name
+        mod_skills = list(data.get("subskills") or [])
+        lessons = sorted(p.name for p in (d / "lessons").glob("*.md"))
+        mod = {**data, "id": mod_id, "dir": d.name, "lessons": lessons, "quizzes": []}
+        for skill in mod_skills:
+            subskills.setdefault(skill, []).append(mod_id)
+        for quiz in sorted((d / "quizzes").glob("*.json")):
+            q = _read_json(quiz)
+            if q is None:
+                continue
+            quiz_id = q.get("id", quiz.stem) if isinstance(q, dict) else quiz.stem
+            questions = q.get("questions", []) if isinstance(q, dict) else q
+            ids = []
+            for i, item in enumerate(questions if isinstance(questions, list) else []):
+                errors = validate_question(item)
+                if not isinstance(item, dict):
+                    item = {}
+                item_id = item.get("id") if isinstance(item.get("id"), str) and item.get("id") else f"{quiz_id}:{i}"
+                if item_id in items:
+                    errors.append(f"id duplicado (também em {items[item_id]['quiz']})")
+                    item_id = f"{quiz_id}:{i}"
+                skills = item.get("subskills")
+                items[item_id] = {"module": mod_id, "quiz": quiz_id, "pos": i,
+                                  "subskills": list(skills) if isinstance(skills, list) and skills else mod_skills}
+                if errors:
+                    invalid[item_id] = errors
+                ids.append(item_id)
+            quizzes[quiz_id] = {"module": mod_id, "file": f"{d.name}/quizzes/{quiz.name}", "items": ids}
+            mod["quizzes"].append(quiz_id)
+        modules[mod_id] = mod
+    return {"version": CATALOG_VERSION, "modules_dir": str(modules_dir.resolve()),
+            "stamp": _stamp(modules_dir, paths), "modules": dict(sorted(modules.items())),
+            "quizzes": quizzes, "items": items, "subskills": subskills, "invalid": invalid}
+
+class Catalog:
+    """
+    Catálogo de conteúdo compilado. Todas as consultas são lookups em dicts;
+    `is_stale()` só faz `stat` dos caminhos observados (sem reparsear YAML).
+    """
+    def __init__(self, data: Dict[str, Any]):
+        self.data = data
+        self.modules_dir = Path(data["modules_dir"])
+        self._item_subskills: Dict[str, List[str]] | None = None
+
+    def is_stale(self) -> bool:
+        return any(_stat(self.modules_dir / rel) != v for rel, v in self.data.get("stamp", {}).items())
+
+    def modules(self) -> List[Dict[str, Any]]:
+        return list(self.data["modules"].values())
+
+    def module(self, mod_id: str) -> Dict[str, Any] | None:
+        return self.data["modules"].get(mod_id)
+
+    def quiz(self, quiz_id: str) -> Dict[str, Any] | None:
+        return self.data["quizzes"].get(quiz_id)
+
+    def item(self, item_id: str) -> Dict[str, Any] | None:
+        return self.data["items"].get(item_id)
+
+    def subskills_of(self, item_id: str) -> List[str]:
+        return self.item_subskills().get(item_id, [])
+
+    def modules_for_subskill(self, subskill: str) -> List[str]:
+        return self.data["subskills"].get(subskill, [])
+
+    def item_subskills(self) -> Dict[str, List[str]]:
+        """Mapa item -> subskills (também módulo -> e quiz -> subskills do módulo)."""
+        if self._item_subskills is None:
+            out = {mod_id: list(m.get("subskills") or []) for mod_id, m in self.data["modules"].items()}
+            for quiz_id, q in self.data["quizzes"].items():
+                out.setdefault(quiz_id, out.get(q["module"], []))
+            out.update((item_id, it["subskills"]) for item_id, it in self.data["items"].items())
+            self._item_subskills = out
+        return self._item_subskills
+
+def _cache_path(cache_path) -> Path:
+    return Path(cache_path) if cache_path is not None else CATALOG_PATH
+
+def load_catalog(modules_dir: str | Path = MODULES_DIR, cache_path: str | Path | None = None,
+                 rebuild: bool = False) -> Catalog:
+    """
+    Carrega o catálogo do cache em disco; recompila (e regrava o cache) se
+    algum mtime observado mudou, se o cache é de outro diretório ou se
+    `rebuild=True`.
+    """
+    path = _cache_path(cache_path)
+    modules_dir = Path(modules_dir)
+    if not rebuild and path.exists():
+        data = _read_json(path)
+        if (isinstance(data, dict) and data.get("version") == CATALOG_VERSION
+                and data.get("modules_dir") == str(modules_dir.resolve())):
+            cat = Catalog(data)
+            if not cat.is_stale():
+                return cat
+    cat = Catalog(compile_catalog(modules_dir))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(cat.data, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    log.info("Catálogo compilado: %d módulos, %d itens", len(cat.data["modules"]), len(cat.data["items"]))
+    if cat.data["invalid"]:
+        log.warning("%d questões fora do esquema: %s", len(cat.data["invalid"]), ", ".join(cat.data["invalid"]))
+    return cat
+
+_cached: Dict[tuple, Catalog] = {}
+
+def get_catalog(modules_dir: str | Path = MODULES_DIR, cache_path: str | Path | None = None) -> Catalog:
+    """Catálogo memoizado no processo, revalidado por `stat` a cada chamada."""
+    key = (str(Path(modules_dir).resolve()), str(_cache_path(cache_path)))
+    cat = _cached.get(key)
+    if cat is None or cat.is_stale():
+        cat = _cached[key] = load_catalog(modules_dir, cache_path)
+    return cat
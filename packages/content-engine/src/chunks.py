@@ -0,0 +1,72 @@
+from __future__ import annotations
+import mmap
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+class Chunk(NamedTuple):
+    page: int
+    start: int   # offset em bytes no sidecar de texto
+    length: int  # tamanho em bytes
+    text: str
+
+def chunk_page(text: str, page: int, base: int = 0, size: int = 800, overlap: int = 200) -> Iterator[Chunk]:
+    """
+    Divide o texto de uma página em janelas de ~`size` caracteres com
+    `overlap` de sobreposição, cortando em espaço quando possível. `base` é o
+    offset em bytes UTF-8 da página no sidecar de texto.
+    """
+    if overlap >= size:
+        raise ValueError("overlap deve ser menor que size")
+    start, char_pos, byte_pos = 0, 0, base
+    while start < len(text) and text[start:].strip():
+        end = min(len(text), start + size)
+        if end < len(text):
+            sp = text.rfind(" ", start + size // 2, end)
+            if sp > start:
+                end = sp
+        byte_pos += len(text[char_pos:start].encode("utf-8"))
+        char_pos = start
+        piece = text[start:end]
+        yield Chunk(page, byte_pos, len(piece.encode("utf-8")), piece)
+        if end >= len(text):
+            break
+        nxt = max(end - overlap, start + 1)
+        sp = text.find(" ", nxt, end)
+        start = sp + 1 if sp != -1 else nxt
+
+def chunk_pages(pages: Iterable[str], size: int = 800, overlap: int = 200, sep_bytes: int = 1) -> Iterator[Chunk]:
+    """Chunks de todas as páginas (nunca atravessam páginas); separador de `sep_bytes` bytes entre páginas."""
+    base = 0
+    for n, text in enumerate(pages, 1):
+        yield from chunk_page(text, n, base, size, overlap)
+        base += len(text.encode("utf-8")) + sep_bytes
+
+class ChunkReader:
+    """Lê chunks direto dos sidecars via mmap (LRU de arquivos mapeados)."""
+    def __init__(self, max_open: int = 64):
+        self.max_open = max_open
+        self._maps: OrderedDict[str, tuple] = OrderedDict()
+
+    def read(self, text_path: str, start: int, length: int) -> str:
+        entry = self._maps.get(text_path)
+        if entry is None:
+            f = open(text_path, "rb")
+            if Path(text_path).stat().st_size == 0:
+                f.close()
+                return ""
+            entry = (f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            self._maps[text_path] = entry
+            while len(self._maps) > self.max_open:
+                _, (of, om) = self._maps.popitem(last=False)
+                om.close()
+                of.close()
+        else:
+            self._maps.move_to_end(text_path)
+        return entry[1][start:start + length].decode("utf-8", errors="replace")
+
+    def close(self):
+        for f, m in self._maps.values():
+            m.close()
+            f.close()
+        self._maps.clear()
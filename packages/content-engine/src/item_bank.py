@@ -0,0 +1,170 @@
+from __future__ import annotations
+import json, random
+from array import array
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+from .catalog import Catalog, MODULES_DIR, get_catalog
+
+def _normalize(item: Dict[str, Any]) -> Dict[str, Any]:
+    options = item.get("options")
+    return {"type": item.get("type") or ("mcq" if options else "open"),
+            "stem": item.get("stem", item.get("q")), "options": options,
+            "answer": item.get("answer", item.get("a")), "rationale": item.get("rationale"),
+            "difficulty": item.get("difficulty")}
+
+@lru_cache(maxsize=256)
+def _quiz_questions(path: str, mtime_ns: int) -> Tuple[Dict[str, Any], ...]:
+    # mtime na chave: quiz editado é relido sem invalidação explícita
+    q = json.loads(Path(path).read_text(encoding="utf-8"))
+    return tuple(q.get("questions", []) if isinstance(q, dict) else q)
+
+class ItemBank:
+    """
+    Banco de itens sobre o catálogo compilado: cada item válido vira uma linha
+    em arrays compactos (módulo, quiz, posição da questão no quiz) com índices
+    por id, subskill e módulo. Localizar um item é O(1); o texto da questão só
+    é lido (e memoizado por quiz) quando pedido.
+    """
+    def __init__(self, catalog: Catalog):
+        self.catalog = catalog
+        data = catalog.data
+        self.modules: List[str] = list(data["modules"])
+        self.quizzes: List[str] = list(data["quizzes"])
+        self._mod_idx = mod_idx = {m: i for i, m in enumerate(self.modules)}
+        quiz_idx = {q: i for i, q in enumerate(self.quizzes)}
+        self.invalid: Dict[str, List[str]] = data.get("invalid", {})
+        self.ids: List[str] = [i for i in data["items"] if i not in self.invalid]
+        self.row: Dict[str, int] = {item_id: r for r, item_id in enumerate(self.ids)}
+        self.module_of = array("I")
+        self.quiz_of = array("I")
+        self.pos = array("I")
+        self.subskills: List[Tuple[str, ...]] = []
+        self.by_subskill: Dict[str, array] = {}
+        self.by_module: Dict[str, array] = {m: array("I") for m in self.modules}
+        for r, item_id in enumerate(self.ids):
+            it = data["items"][item_id]
+            self.module_of.append(mod_idx[it["module"]])
+            self.quiz_of.append(quiz_idx[it["quiz"]])
+            self.pos.append(it["pos"])
+            self.subskills.append(tuple(it["subskills"]))
+            self.by_module[it["module"]].append(r)
+            for s in it["subskills"]:
+                self.by_subskill.setdefault(s, array("I")).append(r)
+        self._group_cache: Dict[tuple, list] = {}
+
+    @classmethod
+    def load(cls, modules_dir: str | Path = MODULES_DIR, cache_path: str | Path | None = None) -> "ItemBank":
+        return cls(get_catalog(modules_dir, cache_path))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self.row
+
+    def locate(self, item_id: str) -> Tuple[str, str, int]:
+        """(módulo, quiz, posição no quiz); KeyError se o item não existe ou é inválido."""
+        r = self.row[item_id]
+        return self.modules[self.module_of[r]], self.quizzes[self.quiz_of[r]], self.pos[r]
+
+    def question(self, item_id: str) -> Dict[str, Any]:
+        """Questão normalizada (`stem`, `options`, `answer`, ...) com id, módulo, quiz e subskills."""
+        r = self.row[item_id]
+        quiz = self.quizzes[self.quiz_of[r]]
+        path = self.catalog.modules_dir / self.catalog.data["quizzes"][quiz]["file"]
+        raw = _quiz_questions(str(path), path.stat().st_mtime_ns)[self.pos[r]]
+        return {"id": item_id, "module": self.modules[self.module_of[r]], "quiz": quiz,
+                "subskills": list(self.subskills[r]), **_normalize(raw)}
+
+    def _rows(self, subskill: str | None, module: str | None):
+        if subskill is not None:
+            rows = self.by_subskill.get(subskill, array("I"))
+            if module is not None:
+                m = self._mod_idx.get(module, -1)
+                rows = [r for r in rows if self.module_of[r] == m]
+            return rows
+        if module is not None:
+            return self.by_module.get(module, array("I"))
+        return range(len(self.ids))
+
+    def sample(self, k: int, subskill: str | None = None, module: str | None = None,
+               rng: random.Random | None = None) -> List[str]:
+        """Até `k` itens distintos sorteados uniformemente (opcionalmente por subskill/módulo)."""
+        rows = self._rows(subskill, module)
+        rows = (rng or random).sample(rows, min(k, len(rows)))
+        return [self.ids[r] for r in rows]
+
+    def _groups(self, subskill: str | None, module: str | None) -> List[Tuple[Tuple[str, ...], array]]:
+        """Linhas do filtro agrupadas por conjunto de subskills (o peso só depende dele); memoizado."""
+        key = (subskill, module)
+        groups = self._group_cache.get(key)
+        if groups is None:
+            by_skills: Dict[Tuple[str, ...], array] = {}
+            for r in self._rows(subskill, module):
+                by_skills.setdefault(self.subskills[r], array("I")).append(r)
+            groups = self._group_cache[key] = list(by_skills.items())
+        return groups
+
+    def _allowed(self, r: int, subskill: str | None, module: str | None) -> bool:
+        return ((subskill is None or subskill in self.subskills[r])
+                and (module is None or self.module_of[r] == self._mod_idx.get(module, -1)))
+
+    def adaptive_sample(self, engine, k: int, subskill: str | None = None, module: str | None = None,
+                        now: int | None = None, rng: random.Random | None = None) -> List[str]:
+        """
+        Até `k` itens para a próxima rodada: primeiro os vencidos no `engine`
+        (ordem de vencimento), depois itens ainda não vistos sorteados sem
+        reposição com peso 1 − mastery médio dos subskills (mínimo 0,05), de
+        modo que subskills fracos apareçam mais. O sorteio é feito sobre os
+        grupos de itens com os mesmos subskills (pré-computados por filtro):
+        cada item sorteado custa O(grupos), não O(itens do banco).
+        """
+        out: List[str] = []
+        offset, page = 0, max(4 * k, 64)
+        while len(out) < k:
+            due = engine.store.due_items(now=now, limit=page, offset=offset)
+            out += [i for i in due if i in self.row and self._allowed(self.row[i], subskill, module)][:k - len(out)]
+            if len(due) < page:
+                break
+            offset += page
+        need = k - len(out)
+        groups = self._groups(subskill, module)
+        if need <= 0 or not groups:
+            return out
+        mastery: Dict[str, float] = {}
+        def weight(skills: Tuple[str, ...]) -> float:
+            if not skills:
+                return 1.0
+            for s in skills:
+                if s not in mastery:
+                    mastery[s] = engine.mastery(s) / 100
+            return max(0.05, 1 - sum(mastery[s] for s in skills) / len(skills))
+        rng = rng or random
+        weights = [weight(skills) for skills, _ in groups]
+        taken = [0] * len(groups)
+        swaps: List[Dict[int, int]] = [{} for _ in groups]  # Fisher–Yates parcial sem copiar o grupo
+        remaining = sum(len(rows) for _, rows in groups)
+        def draw() -> int:
+            # sorteio sucessivo ponderado sem reposição: grupo ∝ peso × itens restantes, item uniforme nele
+            x = rng.random() * sum(w * (len(rows) - t) for w, (_, rows), t in zip(weights, groups, taken))
+            g = 0
+            for g, (w, (_, rows), t) in enumerate(zip(weights, groups, taken)):
+                x -= w * (len(rows) - t)
+                if x < 0 and t < len(rows):
+                    break
+            while taken[g] == len(groups[g][1]):  # arredondamento caiu num grupo esgotado
+                g -= 1
+            rows, t, sw = groups[g][1], taken[g], swaps[g]
+            j = rng.randrange(t, len(rows))
+            r = sw.get(j, j)
+            sw[j] = sw.get(t, t)
+            taken[g] = t + 1
+            return rows[r]
+        fresh: List[str] = []
+        while len(fresh) < need and remaining:
+            cand = [self.ids[draw()] for _ in range(min(remaining, 4 * (need - len(fresh))))]
+            remaining -= len(cand)
+            seen = engine.store.get_intervals(cand)
+            fresh += [i for i in cand if seen[i] == (0, 0)]
+        return out + fresh[:need]
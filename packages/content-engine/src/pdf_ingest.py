@@ -1,9 +1,14 @@
 from __future__ import annotations
-import os, json, hashlib
+import os, json, hashlib, mmap
+from contextlib import closing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import Callable, Iterable, Iterator, List, Dict, Any, Tuple
 from mega_common.config import CONFIG
 from mega_common.logging import get_logger
+from .chunks import ChunkReader
+from .text_index import TextIndex, connect_readonly
+from . import vector_index
 
 log = get_logger("pdf.ingest")
 
@@ -13,32 +18,176 @@ except ImportError:  # pragma: no cover
     PyPDF2 = None
 
 INDEX_PATH = Path(CONFIG.pdf.index_path)
+TEXT_DIR = Path(CONFIG.pdf.text_dir)
+SEARCH_PATH = Path(CONFIG.pdf.search_index_path)
+VECTOR_DIR = Path(CONFIG.pdf.vector_dir)
+PAGE_SEP = "\f"  # separador de páginas no sidecar de texto
 
 def _hash_bytes(data: bytes) -> str:
     return hashlib.sha256(data).hexdigest()
 
+def _hash_file(path: Path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _hash_mmap(f) -> str:
+    # mmap evita copiar o arquivo para o heap: as páginas são do cache do SO
+    if os.fstat(f.fileno()).st_size == 0:
+        return _hash_bytes(b"")
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return hashlib.sha256(mm).hexdigest()
+
+def _pages(reader) -> Iterator[str]:
+    for page in reader.pages:
+        try:
+            yield page.extract_text() or ""
+        except Exception:
+            yield ""
+
+def iter_pages(pdf_path: Path) -> Iterator[Tuple[int, str]]:
+    """Gera (número da página, texto), uma página por vez."""
+    if not PyPDF2:
+        raise RuntimeError("PyPDF2 não instalado. pip install PyPDF2")
+    with open(pdf_path, "rb") as f:
+        for n, text in enumerate(_pages(PyPDF2.PdfReader(f)), 1):
+            yield n, text
+
+def text_path(file_hash: str) -> Path:
+    return TEXT_DIR / file_hash[:2] / f"{file_hash}.txt"
+
+def iter_text_pages(meta: Dict[str, Any]) -> Iterator[str]:
+    """Texto por página a partir do sidecar gravado na ingestão, lido em blocos."""
+    tp = meta.get("text_path")
+    if not tp or not Path(tp).exists():
+        return
+    buf = ""
+    # newline="": offsets dos chunks são em bytes do arquivo, sem tradução de \r\n
+    with open(tp, "r", encoding="utf-8", newline="") as f:
+        for chunk in iter(lambda: f.read(1 << 16), ""):
+            buf += chunk
+            *pages, buf = buf.split(PAGE_SEP)
+            yield from pages
+    yield buf
+
+def read_pages(meta: Dict[str, Any]) -> List[str]:
+    return list(iter_text_pages(meta))
+
 def extract_text(pdf_path: Path) -> Dict[str, Any]:
+    """
+    Extração em fluxo: hash via mmap, páginas processadas uma a uma com
+    contagem e preview incrementais e texto completo gravado no sidecar
+    `text_dir/<hash[:2]>/<hash>.txt` (páginas separadas por form feed).
+    Nenhum momento mantém o texto do documento inteiro em memória.
+    """
     if not PyPDF2:
         raise RuntimeError("PyPDF2 não instalado. pip install PyPDF2")
-    meta: Dict[str, Any] = {"pages": 0, "chars": 0, "preview": "", "hash": ""}
-    text_parts: List[str] = []
+    st = os.stat(pdf_path)
+    meta: Dict[str, Any] = {"pages": 0, "chars": 0, "preview": "", "hash": "",
+                            "mtime": st.st_mtime_ns, "size": st.st_size}
+    preview_chars = CONFIG.pdf.preview_chars
+    preview: List[str] = []
+    preview_len = 0
     with open(pdf_path, "rb") as f:
-        raw = f.read()
-        meta["hash"] = _hash_bytes(raw)
-        f.seek(0)
-        reader = PyPDF2.PdfReader(f)
-        for page in reader.pages:
-            meta["pages"] += 1
-            try:
-                t = page.extract_text() or ""
-            except Exception:
-                t = ""
-            text_parts.append(t)
-    full = "\n".join(text_parts)
-    meta["chars"] = len(full)
-    meta["preview"] = full[:CONFIG.pdf.preview_chars]
+        meta["hash"] = _hash_mmap(f)
+        out = text_path(meta["hash"])
+        out.parent.mkdir(parents=True, exist_ok=True)
+        tmp = out.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8", newline="") as sidecar:
+            for t in _pages(PyPDF2.PdfReader(f)):
+                if meta["pages"]:
+                    sidecar.write(PAGE_SEP)
+                    t_sep = "\n" + t  # `chars`/`preview` seguem o texto unido por "\n"
+                else:
+                    t_sep = t
+                sidecar.write(t.replace(PAGE_SEP, " "))
+                meta["pages"] += 1
+                meta["chars"] += len(t_sep)
+                if preview_len < preview_chars:
+                    piece = t_sep[:preview_chars - preview_len]
+                    preview.append(piece)
+                    preview_len += len(piece)
+        tmp.replace(out)
+    meta["preview"] = "".join(preview)
+    meta["text_path"] = str(out)
     return meta
 
+def search(query: str, k: int = 10) -> List[Dict[str, Any]]:
+    """Busca BM25 por página no texto completo dos PDFs indexados."""
+    if not SEARCH_PATH.exists():
+        return []
+    idx = TextIndex(SEARCH_PATH, readonly=True)
+    try:
+        return idx.search(query, k)
+    finally:
+        idx.close()
+
+def retrieve(topic: str, k: int = 5) -> List[Dict[str, Any]]:
+    """
+    Top-k chunks (BM25) para um tópico, com o texto lido dos sidecars via
+    mmap: [{file, page, score, text}]. Usado para embasar a geração de casos.
+    """
+    if not SEARCH_PATH.exists():
+        return []
+    idx, reader = TextIndex(SEARCH_PATH, readonly=True), ChunkReader()
+    try:
+        out = []
+        for hit in idx.search_chunks(topic, k):
+            tp, start, length = hit.pop("text_path"), hit.pop("start"), hit.pop("length")
+            try:
+                hit["text"] = reader.read(tp, start, length)
+            except OSError as e:
+                log.warning("Sidecar indisponível %s: %s", tp, e)
+                continue
+            out.append(hit)
+        return out
+    finally:
+        reader.close()
+        idx.close()
+
+def build_vectors() -> int:
+    """Atualiza o índice vetorial a partir dos chunks indexados (só embute chunks novos)."""
+    if not SEARCH_PATH.exists():
+        return 0
+    return vector_index.build(SEARCH_PATH, VECTOR_DIR)
+
+_vector_cache: Dict[str, Any] = {"stamp": None, "index": None}
+
+def _vector_index():
+    """VectorIndex (e seu embedder) memoizado até `build_vectors` publicar uma versão nova."""
+    stamp = vector_index.index_stamp(VECTOR_DIR)
+    if stamp != _vector_cache["stamp"]:
+        _vector_cache["stamp"] = stamp
+        _vector_cache["index"] = vector_index.VectorIndex.load(VECTOR_DIR) if stamp else None
+    return _vector_cache["index"]
+
+def semantic_search(query: str, k: int = 5) -> List[Dict[str, Any]]:
+    """Top-k chunks por similaridade vetorial (ANN): [{file, page, score, text}]."""
+    vidx = _vector_index()
+    if vidx is None or not SEARCH_PATH.exists():
+        return []
+    reader = ChunkReader()
+    try:
+        hits = vidx.search(query, k)
+        if not hits:
+            return []
+        with closing(connect_readonly(SEARCH_PATH)) as c:
+            marks = ",".join("?" * len(hits))
+            rows = {r[0]: r[1:] for r in c.execute(
+                f"SELECT rowid, file, page, text_path, start, length FROM chunks WHERE rowid IN ({marks})",
+                [h[0] for h in hits])}
+        out = []
+        for rowid, score in hits:
+            if rowid not in rows:
+                continue  # chunk removido depois da última construção do índice vetorial
+            f, page, tp, start, length = rows[rowid]
+            out.append({"file": f, "page": page, "score": score, "text": reader.read(tp, start, length)})
+        return out
+    finally:
+        reader.close()
+
 def load_index() -> Dict[str, Any]:
     if INDEX_PATH.exists():
         try:
@@ -53,26 +202,184 @@ def save_index(idx: Dict[str, Any]):
     tmp.write_text(json.dumps(idx, ensure_ascii=False, indent=2), encoding="utf-8")
     tmp.replace(INDEX_PATH)
 
+class IndexWriter:
+    """
+    Escritor em lote do índice: carrega o JSON uma vez, acumula alterações e
+    grava a cada `checkpoint_every` alterações e no `close()`. Como cada
+    checkpoint já contém mtime/size dos arquivos concluídos, uma ingestão
+    interrompida é retomada pelo modo incremental de `batch_index`. O índice
+    de busca full-text (`TextIndex`) é atualizado junto e confirmado antes de
+    cada checkpoint do JSON, para nunca ficar atrás dele.
+    """
+    def __init__(self, checkpoint_every: int | None = None, search: bool = True):
+        self.checkpoint_every = checkpoint_every or CONFIG.pdf.checkpoint_every
+        self.index = load_index()
+        self.search = None
+        if search:
+            try:
+                self.search = TextIndex(SEARCH_PATH)
+            except RuntimeError as e:
+                log.warning("Busca full-text desativada: %s", e)
+        self._dirty = 0
+        self._replaced: List[Dict[str, Any]] = []  # entradas antigas cujo sidecar pode ter ficado órfão
+
+    def put(self, key: str, meta: Dict[str, Any], pages: Iterable[str] | None = None):
+        """Grava a entrada; com `pages`, (re)indexa também o texto (páginas e chunks) para busca."""
+        old = self.index.get(key)
+        if old is not None and old is not meta:
+            self._replaced.append(old)
+        self.index[key] = meta
+        if pages is not None and self.search:
+            self.search.add_document(key, pages, text_path=meta.get("text_path"))
+        self._touch()
+
+    def delete(self, key: str):
+        old = self.index.pop(key, None)
+        if self.search:
+            self.search.remove_document(key)
+        if old is not None:
+            self._replaced.append(old)
+            self._touch()
+
+    def _touch(self):
+        self._dirty += 1
+        if self._dirty >= self.checkpoint_every:
+            self.flush()
+
+    def flush(self):
+        if self._dirty:
+            if self.search:
+                self.search.commit()
+            save_index(self.index)
+            self._dirty = 0
+
+    def close(self):
+        self.flush()
+        if self.search:
+            self.search.close()
+            self.search = None
+        live = {m.get("hash") for m in self.index.values()}
+        for old in self._replaced:
+            if old.get("text_path") and old.get("hash") not in live:
+                Path(old["text_path"]).unlink(missing_ok=True)
+        self._replaced.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
 def index_pdf(path: Path):
     log.info("Indexando PDF: %s", path)
     meta = extract_text(path)
-    idx = load_index()
-    idx[str(path)] = meta
-    save_index(idx)
+    with IndexWriter() as w:
+        w.put(str(path), meta, pages=iter_text_pages(meta))
     return meta
 
-def batch_index(target: str):
+def _extract_safe(path: Path) -> Tuple[Path, Dict[str, Any] | None, str | None]:
+    # roda nos processos do pool: erros voltam como valor, não derrubam o lote
+    try:
+        return path, extract_text(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+def _collect(p: Path) -> List[Path]:
+    files = []
+    for root, _, names in os.walk(p):
+        for f in names:
+            fp = Path(root)/f
+            if fp.suffix.lower() in CONFIG.pdf.allowed_extensions:
+                files.append(fp)
+    return sorted(files)
+
+ProgressFn = Callable[[int, int, Path], None]
+
+def _unchanged(path: Path, entry: Dict[str, Any] | None) -> bool:
+    """(mtime, size) iguais -> inalterado; só o tamanho igual -> confirma pelo hash."""
+    if not entry:
+        return False
+    st = path.stat()
+    if st.st_size != entry.get("size"):
+        return False
+    if st.st_mtime_ns == entry.get("mtime"):
+        return True
+    if entry.get("hash") and _hash_file(path) == entry["hash"]:
+        entry["mtime"] = st.st_mtime_ns  # tocado mas idêntico: só atualiza o mtime
+        return True
+    return False
+
+def batch_index(target: str, workers: int = 1, progress: ProgressFn | None = None, force: bool = False):
+    """
+    Indexa um PDF ou diretório de forma incremental: arquivos com (mtime, size)
+    iguais aos do índice são pulados (com fallback para o hash quando só o mtime
+    mudou); os que ainda não estão na busca full-text entram nela a partir do
+    sidecar. Entradas de arquivos removidos sob `target` são podadas e `force`
+    reextrai tudo. O índice é aberto uma única vez (`IndexWriter`) e gravado
+    em checkpoints, não a cada arquivo. Com `workers > 1` a extração
+    (CPU-bound) roda num ProcessPoolExecutor e os resultados voltam ao
+    processo principal, que é o único a escrever no índice.
+    `progress(done, total, path)` é chamado a cada arquivo concluído.
+    """
     p = Path(target)
-    results = []
-    if p.is_file() and p.suffix.lower() in CONFIG.pdf.allowed_extensions:
-        results.append(index_pdf(p))
+    if p.is_file():
+        files = [p] if p.suffix.lower() in CONFIG.pdf.allowed_extensions else []
     else:
-        for root, _, files in os.walk(p):
-            for f in files:
-                fp = Path(root)/f
-                if fp.suffix.lower() in CONFIG.pdf.allowed_extensions:
-                    try:
-                        results.append(index_pdf(fp))
-                    except Exception as e:  # pragma: no cover
-                        log.error("Falha indexando %s: %s", fp, e)
-    return results
\ No newline at end of file
+        files = _collect(p)
+    with IndexWriter() as writer:
+        idx = writer.index
+        present = {str(fp) for fp in files}
+        prefix = str(p).rstrip(os.sep) + os.sep
+        stale = [k for k in idx if k not in present and (k == str(p) or k.startswith(prefix))]
+        for k in stale:
+            writer.delete(k)
+        searchable = writer.search.documents() if writer.search else None
+        pending, backfilled = [], 0
+        for fp in files:
+            entry = idx.get(str(fp))
+            old_mtime = entry.get("mtime") if entry else None
+            if not force and _unchanged(fp, entry):
+                if searchable is not None and str(fp) not in searchable:
+                    # índice anterior à busca full-text: reindexa a partir do sidecar, sem reextrair
+                    tp = entry.get("text_path")  # type: ignore[union-attr]
+                    if not tp or not Path(tp).exists():
+                        pending.append(fp)
+                        continue
+                    writer.put(str(fp), entry, pages=iter_text_pages(entry))  # type: ignore[arg-type]
+                    backfilled += 1
+                elif entry["mtime"] != old_mtime:  # type: ignore[index]
+                    writer.put(str(fp), entry)  # type: ignore[arg-type]
+                continue
+            pending.append(fp)
+        total = len(pending)
+        results = []
+        processed = 0
+
+        def done(path: Path, meta: Dict[str, Any] | None, err: str | None):
+            nonlocal processed
+            processed += 1
+            if err is not None:
+                log.error("Falha indexando %s: %s", path, err)
+            else:
+                writer.put(str(path), meta, pages=iter_text_pages(meta))  # type: ignore[arg-type]
+                results.append(meta)
+            if progress:
+                progress(processed, total, path)
+
+        if workers <= 1 or total <= 1:
+            for fp in pending:
+                log.info("Indexando PDF: %s", fp)
+                done(*_extract_safe(fp))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [pool.submit(_extract_safe, fp) for fp in pending]
+                for fut in as_completed(futures):
+                    done(*fut.result())
+    log.info("PDFs: %d indexados, %d inalterados (%d incluídos na busca), %d removidos do índice",
+             len(results), len(files) - total, backfilled, len(stale))
+    if (results or stale) and CONFIG.pdf.vector_index:
+        try:
+            build_vectors()
+        except RuntimeError as e:
+            log.warning("Índice vetorial não atualizado: %s", e)
+    return results
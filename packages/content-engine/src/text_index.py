@@ -0,0 +1,131 @@
+from __future__ import annotations
+import re, sqlite3, unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+from mega_common.config import CONFIG
+from mega_common.logging import get_logger
+from .chunks import chunk_page
+
+log = get_logger("pdf.search")
+
+STOPWORDS_PT = frozenset("""
+a ao aos as ate com como da das de dela dele deles do dos e ela elas ele eles em entre era essa esse esta
+este eu foi for ha isso isto ja la lhe mais mas me mesmo muito na nao nas nem no nos o os ou para pela
+pelas pelo pelos por qual quando que quem se sem ser seu seus sua suas tambem te tem ter um uma umas uns
+""".split())
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+def fold(text: str) -> str:
+    """Minúsculas sem acentos, preservando o comprimento (1 caractere -> 1 caractere)."""
+    return "".join(unicodedata.normalize("NFKD", ch)[:1] for ch in text.lower())
+
+def _stem(tok: str) -> str:
+    # normalização leve de plural do português (sobre o texto já sem acentos)
+    if len(tok) <= 3:
+        return tok
+    for suf, rep in (("oes", "ao"), ("aes", "ao"), ("ais", "al"), ("eis", "el"), ("ois", "ol"), ("ns", "m")):
+        if tok.endswith(suf):
+            return tok[:-len(suf)] + rep
+    if tok.endswith("res") or tok.endswith("zes"):
+        return tok[:-2]
+    if tok.endswith("s") and not tok.endswith(("ss", "us", "is")):
+        return tok[:-1]
+    return tok
+
+def tokenize(text: str) -> List[str]:
+    """Tokens para indexação/consulta: sem acento, sem stopwords, plural normalizado."""
+    return [_stem(t) for t in _WORD.findall(fold(text)) if t not in STOPWORDS_PT]
+
+def _snippet(raw: str, terms: List[str], width: int = 240) -> str:
+    folded = fold(raw)
+    pos = min((i for i in (folded.find(t) for t in terms) if i >= 0), default=0)
+    start = max(0, pos - width // 3)
+    return raw[start:start + width].replace("\n", " ").strip()
+
+def connect_readonly(path: str | Path) -> sqlite3.Connection:
+    """Conexão só de leitura (sem DDL nem PRAGMA) para os caminhos de consulta."""
+    return sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+
+class TextIndex:
+    """
+    Índice invertido persistente do texto completo dos PDFs, por página.
+    Usa SQLite FTS5 (postings + ranking BM25 nativos) sobre tokens já
+    normalizados por `tokenize`; o texto original da página fica numa coluna
+    não indexada para os snippets. Com `text_path`, indexa também chunks
+    sobrepostos da página (tabela `chunks`), guardando só os offsets em bytes
+    no sidecar: o texto é lido depois via mmap (`chunks.ChunkReader`).
+    `readonly` abre um índice existente só para consulta.
+    """
+    def __init__(self, path: str | Path | None = None, readonly: bool = False):
+        self.path = Path(path or CONFIG.pdf.search_index_path)
+        if readonly:
+            # caminho de consulta: sem DDL nem PRAGMA, o esquema já foi criado pelo escritor
+            self._c = connect_readonly(self.path)
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._c = sqlite3.connect(self.path)
+        self._c.execute("PRAGMA journal_mode=wal")
+        try:
+            self._c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+                file UNINDEXED, page UNINDEXED, body, raw UNINDEXED,
+                tokenize = 'unicode61 remove_diacritics 2')""")
+            self._c.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS chunks USING fts5(
+                file UNINDEXED, page UNINDEXED, text_path UNINDEXED, start UNINDEXED, length UNINDEXED, body,
+                tokenize = 'unicode61 remove_diacritics 2')""")
+        except sqlite3.OperationalError as e:
+            self._c.close()
+            raise RuntimeError(f"SQLite sem suporte a FTS5: {e}") from e
+
+    def add_document(self, file: str, pages: Iterable[str], text_path: str | None = None):
+        """Indexa as páginas (consumidas uma a uma) e, com `text_path`, os chunks de cada página."""
+        self.remove_document(file)
+        cfg = CONFIG.pdf
+        base = 0
+        for n, text in enumerate(pages, 1):
+            self._c.execute("INSERT INTO pages(file, page, body, raw) VALUES(?,?,?,?)",
+                            (file, n, " ".join(tokenize(text)), text))
+            if text_path:
+                self._c.executemany(
+                    "INSERT INTO chunks(file, page, text_path, start, length, body) VALUES(?,?,?,?,?,?)",
+                    ((file, n, text_path, ch.start, ch.length, " ".join(tokenize(ch.text)))
+                     for ch in chunk_page(text, n, base, cfg.chunk_chars, cfg.chunk_overlap)))
+                base += len(text.encode("utf-8")) + 1  # + separador de página (\f)
+
+    def remove_document(self, file: str):
+        self._c.execute("DELETE FROM pages WHERE file=?", (file,))
+        self._c.execute("DELETE FROM chunks WHERE file=?", (file,))
+
+    def documents(self) -> set[str]:
+        """Arquivos com páginas no índice (para detectar índices criados antes da busca full-text)."""
+        return {f for (f,) in self._c.execute("SELECT DISTINCT file FROM pages")}
+
+    def commit(self):
+        self._c.commit()
+
+    def close(self):
+        if self._c.in_transaction:
+            self._c.commit()
+        self._c.close()
+
+    def search(self, query: str, k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k páginas por BM25: [{file, page, score, snippet}]."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        rows = self._c.execute("""SELECT file, page, bm25(pages) AS score, raw FROM pages
+            WHERE pages MATCH ? ORDER BY score LIMIT ?""", (match, k)).fetchall()
+        return [{"file": f, "page": p, "score": round(-s, 4), "snippet": _snippet(raw, terms)}
+                for f, p, s, raw in rows]
+
+    def search_chunks(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k chunks por BM25: [{file, page, text_path, start, length, score}] (sem o texto)."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        match = " OR ".join(f'"{t}"' for t in terms)
+        rows = self._c.execute("""SELECT file, page, text_path, start, length, bm25(chunks) AS score FROM chunks
+            WHERE chunks MATCH ? ORDER BY score LIMIT ?""", (match, k)).fetchall()
+        return [{"file": f, "page": p, "text_path": tp, "start": st, "length": ln, "score": round(-s, 4)}
+                for f, p, tp, st, ln, s in rows]
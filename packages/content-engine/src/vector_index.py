@@ -0,0 +1,230 @@
+from __future__ import annotations
+import hashlib, json, math, os, shutil, zlib
+from contextlib import closing
+from pathlib import Path
+from typing import Iterator, List, Sequence, Tuple
+from mega_common.config import CONFIG
+from mega_common.logging import get_logger
+from .chunks import ChunkReader
+from .text_index import connect_readonly, tokenize
+
+log = get_logger("pdf.vectors")
+
+try:
+    import numpy as np  # type: ignore
+except ImportError:  # pragma: no cover
+    np = None
+
+class HashingEmbedder:
+    """
+    Embedding sem modelo: palavras normalizadas + n-gramas de caracteres (3 e 4)
+    projetados por hashing (com sinal) em `dim` dimensões e normalizados (L2).
+    Captura variações morfológicas/ortográficas; não captura sinonímia.
+    """
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+        self.name = f"hash-ngram-{dim}"
+
+    def _features(self, text: str) -> Iterator[str]:
+        for t in tokenize(text):
+            yield "w:" + t
+            padded = f" {t} "
+            for n in (3, 4):
+                for i in range(len(padded) - n + 1):
+                    yield padded[i:i+n]
+
+    def embed(self, texts: Sequence[str]):
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for r, text in enumerate(texts):
+            row = out[r]
+            for feat in self._features(text):
+                h = zlib.crc32(feat.encode("utf-8"))
+                row[h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        return out / np.maximum(norms, 1e-12)
+
+class SentenceTransformerEmbedder:
+    """Modelo de embedding local (CPU) via sentence-transformers, se instalado."""
+    def __init__(self, model: str):
+        from sentence_transformers import SentenceTransformer  # type: ignore
+        self.model = SentenceTransformer(model, device="cpu")
+        self.dim = int(self.model.get_sentence_embedding_dimension())
+        self.name = model
+
+    def embed(self, texts: Sequence[str]):
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+def get_embedder(model: str | None = None, dim: int | None = None):
+    model = CONFIG.pdf.embedding_model if model is None else model
+    if model and not model.startswith("hash-ngram"):
+        try:
+            return SentenceTransformerEmbedder(model)
+        except ImportError:
+            log.warning("sentence-transformers não instalado; usando vetores de n-gramas")
+    return HashingEmbedder(dim or CONFIG.pdf.vector_dim)
+
+def _kmeans(x, k: int, iters: int = 10, seed: int = 0):
+    """k-means esférico (vetores normalizados, similaridade por produto interno)."""
+    rng = np.random.default_rng(seed)
+    c = x[rng.choice(len(x), k, replace=False)].copy()
+    for _ in range(iters):
+        assign = np.argmax(x @ c.T, axis=1)
+        sums = np.zeros_like(c)
+        np.add.at(sums, assign, x)
+        counts = np.bincount(assign, minlength=k)
+        nonempty = counts > 0
+        c[nonempty] = sums[nonempty]
+        c /= np.maximum(np.linalg.norm(c, axis=1, keepdims=True), 1e-12)
+    return c
+
+def _assign(x, centroids, batch: int = 65536):
+    return np.concatenate([np.argmax(x[i:i+batch] @ centroids.T, axis=1) for i in range(0, len(x), batch)]) \
+        if len(x) else np.zeros(0, dtype=np.int64)
+
+def _digest(text: str, model: str) -> bytes:
+    return hashlib.sha1(f"{model}\0{text}".encode("utf-8")).digest()
+
+def _current(out: Path) -> Path:
+    """Diretório da versão ativa (`CURRENT` aponta para `v<n>`; layout antigo: o próprio `out`)."""
+    cur = out / "CURRENT"
+    return out / cur.read_text(encoding="utf-8").strip() if cur.exists() else out
+
+def index_stamp(out_dir: str | Path):
+    """Identifica a versão publicada (muda a cada `build`); None se não há índice."""
+    out = Path(out_dir)
+    for f in (out / "CURRENT", out / "meta.json"):
+        try:
+            st = f.stat()
+        except OSError:
+            continue
+        return (str(f), st.st_mtime_ns, st.st_size, f.read_text(encoding="utf-8") if f.name == "CURRENT" else "")
+    return None
+
+def build(search_path: str | Path, out_dir: str | Path, embedder=None, batch: int = 256) -> int:
+    """
+    (Re)constrói o índice vetorial dos chunks do `TextIndex`. Vetores são
+    reaproveitados por conteúdo (sha1 do texto do chunk + nome do embedder),
+    não por rowid (o FTS5 reutiliza rowids de chunks apagados); só textos
+    novos são embutidos. Cada construção grava uma versão nova `v<n>` com
+    `vectors.f32` (memmap N×dim, agrupado por lista IVF), `ids.npy` (rowid do
+    chunk por linha), `hashes.npy`, `centroids.npy`, `offsets.npy` e
+    `meta.json`, e só então troca `CURRENT` atomicamente: leitores nunca veem
+    um índice misturado. A versão anterior é mantida para leitores em curso.
+    Com menos de `vector_ivf_min` vetores usa uma única lista (busca exata).
+    """
+    if np is None:
+        raise RuntimeError("NumPy não instalado. pip install numpy")
+    embedder = embedder or get_embedder()
+    out = Path(out_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    with closing(connect_readonly(search_path)) as c:
+        rows = c.execute("SELECT rowid, text_path, start, length FROM chunks ORDER BY rowid").fetchall()
+    n, dim = len(rows), embedder.dim
+    vecs = np.zeros((n, dim), dtype=np.float32)
+    hashes = np.zeros(n, dtype="S20")
+    reuse = {}
+    old = VectorIndex.load(out)
+    if old is not None and old.model == embedder.name and old.dim == dim and old.hashes is not None:
+        reuse = {bytes(h): r for r, h in enumerate(old.hashes)}
+    embedded = 0
+    reader = ChunkReader()
+    try:
+        for i in range(0, n, batch):
+            texts = [reader.read(tp, start, length) for _, tp, start, length in rows[i:i+batch]]
+            todo, todo_texts = [], []
+            for j, text in enumerate(texts, i):
+                hashes[j] = h = _digest(text, embedder.name)
+                prev = reuse.get(h)
+                if prev is None:
+                    todo.append(j)
+                    todo_texts.append(text)
+                else:
+                    vecs[j] = old.vectors[prev]  # type: ignore[union-attr]
+            if todo:
+                vecs[todo] = embedder.embed(todo_texts)
+                embedded += len(todo)
+    finally:
+        reader.close()
+    if old is not None:
+        old.close()
+    ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=n)
+    if n >= CONFIG.pdf.vector_ivf_min:
+        nlist = int(math.sqrt(n))
+        sample = vecs[np.random.default_rng(0).choice(n, min(n, 50 * nlist), replace=False)]
+        centroids = _kmeans(sample, nlist)
+    else:
+        centroids = np.zeros((1, dim), dtype=np.float32)
+    assign = _assign(vecs, centroids)
+    order = np.argsort(assign, kind="stable")
+    offsets = np.concatenate(([0], np.cumsum(np.bincount(assign, minlength=len(centroids))))).astype(np.int64)
+    versions = sorted(int(d.name[1:]) for d in out.glob("v*") if d.name[1:].isdigit())
+    name = f"v{(versions[-1] + 1) if versions else 1}"
+    tmp = out / f".{name}.tmp"
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir()
+    vecs[order].tofile(tmp / "vectors.f32")
+    np.save(tmp / "ids.npy", ids[order])
+    np.save(tmp / "hashes.npy", hashes[order])
+    np.save(tmp / "centroids.npy", centroids)
+    np.save(tmp / "offsets.npy", offsets)
+    (tmp / "meta.json").write_text(json.dumps({"model": embedder.name, "dim": dim, "count": n,
+                                               "nlist": len(centroids)}), encoding="utf-8")
+    tmp.rename(out / name)
+    cur_tmp = out / "CURRENT.tmp"
+    cur_tmp.write_text(name, encoding="utf-8")
+    os.replace(cur_tmp, out / "CURRENT")
+    for v in versions[:-1]:
+        shutil.rmtree(out / f"v{v}", ignore_errors=True)
+    for legacy in ("vectors.f32", "ids.npy", "centroids.npy", "offsets.npy", "meta.json"):
+        (out / legacy).unlink(missing_ok=True)
+    log.info("Índice vetorial: %d chunks (%d novos), %d listas", n, embedded, len(centroids))
+    return n
+
+class VectorIndex:
+    """Busca aproximada (IVF) sobre os vetores em memmap; só as listas sondadas são lidas do disco."""
+    def __init__(self, path: Path, meta: dict):
+        self.path = path
+        self.model, self.dim, self.count = meta["model"], meta["dim"], meta["count"]
+        self.ids = np.load(path / "ids.npy")
+        self.centroids = np.load(path / "centroids.npy")
+        self.offsets = np.load(path / "offsets.npy")
+        self.hashes = np.load(path / "hashes.npy") if (path / "hashes.npy").exists() else None
+        self.vectors = (np.memmap(path / "vectors.f32", dtype=np.float32, mode="r", shape=(self.count, self.dim))
+                        if self.count else np.zeros((0, self.dim), dtype=np.float32))
+        self._embedder = None
+
+    @classmethod
+    def load(cls, path: str | Path) -> "VectorIndex | None":
+        p = _current(Path(path))
+        if np is None or not (p / "meta.json").exists():
+            return None
+        return cls(p, json.loads((p / "meta.json").read_text(encoding="utf-8")))
+
+    def close(self):
+        mm = getattr(self.vectors, "_mmap", None)
+        self.vectors = None
+        if mm is not None:
+            mm.close()
+
+    def search(self, text: str, k: int = 5, nprobe: int | None = None) -> List[Tuple[int, float]]:
+        """[(rowid do chunk, similaridade cosseno)] dos k vizinhos mais próximos."""
+        if not self.count:
+            return []
+        if self._embedder is None:
+            self._embedder = get_embedder(self.model, self.dim)
+        q = self._embedder.embed([text])[0]
+        nlist = len(self.centroids)
+        nprobe = min(nlist, nprobe or CONFIG.pdf.vector_nprobe)
+        lists = np.argsort(-(self.centroids @ q))[:nprobe] if nlist > 1 else [0]
+        cand_rows, cand_scores = [], []
+        for lst in lists:
+            a, b = int(self.offsets[lst]), int(self.offsets[lst + 1])
+            if a < b:
+                cand_rows.append(np.arange(a, b))
+                cand_scores.append(self.vectors[a:b] @ q)
+        if not cand_rows:
+            return []
+        rows, scores = np.concatenate(cand_rows), np.concatenate(cand_scores)
+        top = np.argpartition(-scores, min(k, len(scores)) - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(self.ids[rows[i]]), round(float(scores[i]), 4)) for i in top]
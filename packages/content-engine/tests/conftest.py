@@ -0,0 +1,43 @@
+import pytest
+
+def _pdf_bytes(pages):
+    """PDF mínimo (Helvetica, uma linha por página) para testes de ingestão."""
+    objs = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for text in pages:
+        esc = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        stream = f"BT /F1 12 Tf 72 720 Td ({esc}) Tj ET".encode("latin-1")
+        objs.append(f"<< /Length {len(stream)} >>\nstream\n{stream.decode('latin-1')}\nendstream")
+        objs.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents {len(objs)} 0 R "
+                    f"/Resources << /Font << /F1 3 0 R >> >> >>")
+        kids.append(f"{len(objs)} 0 R")
+    objs[1] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>"
+    out = b"%PDF-1.4\n"
+    offsets = []
+    for i, o in enumerate(objs, 1):
+        offsets.append(len(out))
+        out += f"{i} 0 obj\n{o}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objs)+1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{o:010d} 00000 n \n" for o in offsets).encode()
+    out += f"trailer\n<< /Size {len(objs)+1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return out
+
+@pytest.fixture
+def make_pdf():
+    pytest.importorskip("PyPDF2")
+    def make(path, pages):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(_pdf_bytes(pages))
+        return path
+    return make
+
+@pytest.fixture(autouse=True)
+def isolated_pdf_paths(tmp_path, monkeypatch):
+    from content_engine.src import pdf_ingest
+    monkeypatch.setattr(pdf_ingest, "INDEX_PATH", tmp_path / "pdf_index.json")
+    monkeypatch.setattr(pdf_ingest, "TEXT_DIR", tmp_path / "pdf_text")
+    monkeypatch.setattr(pdf_ingest, "SEARCH_PATH", tmp_path / "pdf_search.db")
+    monkeypatch.setattr(pdf_ingest, "VECTOR_DIR", tmp_path / "pdf_vectors")
+    from content_engine.src import catalog
+    monkeypatch.setattr(catalog, "CATALOG_PATH", tmp_path / "content_catalog.json")
@@ -0,0 +1,57 @@
+import json, os
+from content_engine.src import catalog
+
+def _module(base, name, skills, questions):
+    d = base / name
+    (d / "lessons").mkdir(parents=True)
+    (d / "quizzes").mkdir()
+    (d / "manifest.yaml").write_text(f"id: {name}\ntitle: {name.upper()}\nsubskills: {json.dumps(skills)}\n")
+    (d / "lessons" / "l1.md").write_text("# Lição")
+    (d / "quizzes" / "q.json").write_text(json.dumps({"id": f"{name}-q", "questions": questions}))
+    return d
+
+def test_catalog_lookups_match_repo_modules(tmp_path):
+    from adaptive.recommendation import load_item_subskills
+    cat = catalog.load_catalog("content/modules", tmp_path / "cat.json")
+    assert [m["id"] for m in cat.modules()] == sorted(m["id"] for m in cat.modules())
+    assert cat.module("ecg-basics")["lessons"] == ["01-introducao.md"]
+    assert cat.item("ecg-q1") == {"module": "ecg-basics", "quiz": "sample", "pos": 0, "subskills": ["ondas"]}
+    assert cat.subskills_of("ecg-intermediate-quiz1:0") == ["analise-eixo", "intervalos"]
+    assert "ecg-basics" in cat.modules_for_subskill("fundamentos-ecg")
+    assert load_item_subskills("content/modules") == cat.item_subskills()
+
+def test_catalog_cache_reused_until_mtime_changes(tmp_path, monkeypatch):
+    mods, cache = tmp_path / "modules", tmp_path / "cat.json"
+    d = _module(mods, "m1", ["s1"], [{"id": "i1"}, {"subskills": ["s2"]}])
+    cat = catalog.load_catalog(mods, cache)
+    assert cat.subskills_of("i1") == ["s1"] and cat.subskills_of("m1-q:1") == ["s2"]
+    monkeypatch.setattr(catalog, "compile_catalog", _no_compile)
+    assert catalog.load_catalog(mods, cache).item_subskills() == cat.item_subskills()
+    monkeypatch.undo()
+    q = d / "quizzes" / "q.json"
+    q.write_text(json.dumps({"id": "m1-q", "questions": [{"id": "i1", "subskills": ["s3"]}]}))
+    st = q.stat()
+    os.utime(q, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert catalog.load_catalog(mods, cache).subskills_of("i1") == ["s3"]
+    _module(mods, "m2", ["s9"], [{"id": "j1"}])
+    fresh = catalog.get_catalog(mods, cache)
+    assert fresh.module("m2")["title"] == "M2" and fresh.modules_for_subskill("s9") == ["m2"]
+    assert catalog.get_catalog(mods, cache) is fresh
+
+def test_modules_dir_resolved_once_outside_repo_root(tmp_path, monkeypatch):
+    repo = catalog.MODULES_DIR
+    monkeypatch.chdir(tmp_path)
+    assert catalog._modules_dir() == repo == (catalog._REPO_ROOT / "content" / "modules").resolve()
+    catalog.load_catalog(repo, tmp_path / "cat.json")
+    monkeypatch.setattr(catalog, "compile_catalog", _no_compile)
+    catalog._cached.clear()
+    assert catalog.get_catalog(cache_path=tmp_path / "cat.json").module("ecg-basics")
+
+def _no_compile(*a):
+    raise AssertionError("catálogo recompilado sem mudança de mtime")
+
+def test_catalog_version_shared_with_web_loader():
+    from pathlib import Path
+    ts = Path("apps/web/lib/loadModules.ts").read_text(encoding="utf-8")
+    assert "catalog_version.json" in ts and "cat.version !== version" in ts
+    assert catalog.load_catalog("content/modules", rebuild=True).data["version"] == catalog.CATALOG_VERSION
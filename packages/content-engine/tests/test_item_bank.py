@@ -0,0 +1,55 @@
+import json, random
+from adaptive.engine import AdaptiveEngine
+from content_engine.src.catalog import load_catalog
+from content_engine.src.item_bank import ItemBank
+
+def _bank(tmp_path):
+    d = tmp_path / "modules" / "m1"
+    (d / "quizzes").mkdir(parents=True)
+    (d / "manifest.yaml").write_text("id: m1\nsubskills: [s1]\n")
+    (d / "quizzes" / "a.json").write_text(json.dumps({"id": "qa", "questions": [
+        {"id": "i1", "q": "P?", "a": "R"},
+        {"id": "i2", "type": "mcq", "stem": "S?", "options": ["x", "y"], "answer": 1, "subskills": ["s2"]},
+        {"id": "bad", "type": "mcq", "stem": "S?", "options": ["x", "y"], "answer": 5},
+    ]}))
+    (d / "quizzes" / "b.json").write_text(json.dumps([{"id": "i1", "q": "dup", "a": "r"}, {"stem": "T?", "answer": "t"}]))
+    return ItemBank(load_catalog(tmp_path / "modules", tmp_path / "cat.json"))
+
+def test_bank_index_and_validation(tmp_path):
+    bank = _bank(tmp_path)
+    assert bank.ids == ["i1", "i2", "b:1"]
+    assert set(bank.invalid) == {"bad", "b:0"} and "duplicado" in bank.invalid["b:0"][0]
+    assert bank.locate("i2") == ("m1", "qa", 1) and "bad" not in bank
+    q = bank.question("b:1")
+    assert (q["type"], q["stem"], q["answer"], q["subskills"]) == ("open", "T?", "t", ["s1"])
+    assert bank.question("i2")["options"] == ["x", "y"]
+    assert sorted(bank.sample(10, rng=random.Random(1))) == ["b:1", "i1", "i2"]
+    assert bank.sample(10, subskill="s2") == ["i2"] and bank.sample(3, module="nope") == []
+
+def test_adaptive_sample_due_first_then_unseen(tmp_path):
+    bank = _bank(tmp_path)
+    eng = AdaptiveEngine(backend="sqlite", path=str(tmp_path / "a.db"))
+    eng.store.set_intervals([("i2", 10, 0), ("i1", 10, 10**12), ("other", 10, 0)])
+    picked = bank.adaptive_sample(eng, 3, rng=random.Random(0))
+    assert picked == ["i2", "b:1"]  # i1 já visto e não vencido; "other" fora do banco
+    assert bank.adaptive_sample(eng, 1, subskill="s1") == ["b:1"]
+
+def test_adaptive_sample_weights_groups_without_per_item_work(tmp_path):
+    d = tmp_path / "modules" / "m1"
+    (d / "quizzes").mkdir(parents=True)
+    (d / "manifest.yaml").write_text("id: m1\nsubskills: [forte]\n")
+    qs = [{"id": f"f{i}", "q": "?", "a": "r"} for i in range(200)]
+    qs += [{"id": f"w{i}", "q": "?", "a": "r", "subskills": ["fraco"]} for i in range(200)]
+    (d / "quizzes" / "q.json").write_text(json.dumps({"id": "q", "questions": qs}))
+    bank = ItemBank(load_catalog(tmp_path / "modules", tmp_path / "cat.json"))
+    eng = AdaptiveEngine(backend="sqlite", path=str(tmp_path / "a.db"))
+    for _ in range(4):
+        eng.update_mastery("forte", 2)
+    calls = []
+    mastery = eng.mastery
+    eng.mastery = lambda s: calls.append(s) or mastery(s)
+    picked = bank.adaptive_sample(eng, 40, rng=random.Random(0))
+    assert len(set(picked)) == 40 and sorted(calls) == ["forte", "fraco"]
+    assert sum(i.startswith("w") for i in picked) > 30  # peso 1,0 contra 0,05
+    assert len(bank._groups(None, None)) == 2
+    assert sorted(bank.adaptive_sample(eng, 500, rng=random.Random(1))) == sorted(bank.ids)
@@ -0,0 +1,61 @@
+import json
+from content_engine.src import pdf_ingest
+
+def test_batch_index_parallel_matches_serial(tmp_path, monkeypatch, make_pdf):
+    for i in range(4):
+        make_pdf(tmp_path / "docs" / f"d{i}.pdf", [f"documento {i}", "segunda pagina"])
+    seen = []
+    monkeypatch.setattr(pdf_ingest, "INDEX_PATH", tmp_path / "serial.json")
+    serial = pdf_ingest.batch_index(str(tmp_path / "docs"))
+    monkeypatch.setattr(pdf_ingest, "INDEX_PATH", tmp_path / "par.json")
+    par = pdf_ingest.batch_index(str(tmp_path / "docs"), workers=2, progress=lambda d, t, p: seen.append((d, t)))
+    assert len(par) == len(serial) == 4
+    assert sorted(seen) == [(1, 4), (2, 4), (3, 4), (4, 4)]
+    assert json.loads((tmp_path / "par.json").read_text()) == json.loads((tmp_path / "serial.json").read_text())
+
+def test_batch_index_skips_unchanged_and_prunes(tmp_path, monkeypatch, make_pdf):
+    import os
+    monkeypatch.setattr(pdf_ingest, "INDEX_PATH", tmp_path / "idx.json")
+    docs = tmp_path / "docs"
+    a = make_pdf(docs / "a.pdf", ["alfa"])
+    b = make_pdf(docs / "b.pdf", ["beta"])
+    assert len(pdf_ingest.batch_index(str(docs))) == 2
+    calls = []
+    real = pdf_ingest.extract_text
+    monkeypatch.setattr(pdf_ingest, "extract_text", lambda p: calls.append(p) or real(p))
+    os.utime(a, ns=(0, 10**9))  # mtime mudou, conteúdo igual -> hash confirma
+    b.unlink()
+    assert pdf_ingest.batch_index(str(docs)) == []
+    assert calls == []
+    idx = pdf_ingest.load_index()
+    assert list(idx) == [str(a)] and idx[str(a)]["mtime"] == 10**9
+    make_pdf(a, ["alfa alterado"])
+    assert len(pdf_ingest.batch_index(str(docs))) == 1 and calls == [a]
+
+def test_batch_index_writes_index_at_checkpoints(tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(pdf_ingest, "INDEX_PATH", tmp_path / "idx.json")
+    monkeypatch.setattr(pdf_ingest.CONFIG.pdf, "checkpoint_every", 2)
+    for i in range(5):
+        make_pdf(tmp_path / "docs" / f"d{i}.pdf", [f"doc {i}"])
+    saves = []
+    real = pdf_ingest.save_index
+    monkeypatch.setattr(pdf_ingest, "save_index", lambda idx: saves.append(len(idx)) or real(idx))
+    assert len(pdf_ingest.batch_index(str(tmp_path / "docs"))) == 5
+    assert saves == [2, 4, 5]
+
+def test_extract_text_streams_pages_to_sidecar(tmp_path, monkeypatch, make_pdf):
+    monkeypatch.setattr(pdf_ingest.CONFIG.pdf, "preview_chars", 8)
+    pdf = make_pdf(tmp_path / "atlas.pdf", ["onda P", "complexo QRS", "onda T"])
+    meta = pdf_ingest.extract_text(pdf)
+    pages = [t for _, t in pdf_ingest.iter_pages(pdf)]
+    full = "\n".join(pages)
+    assert meta["pages"] == 3 and meta["chars"] == len(full) and meta["preview"] == full[:8]
+    assert meta["hash"] == pdf_ingest._hash_file(pdf)
+    assert pdf_ingest.read_pages(meta) == pages
+
+def test_pruned_documents_drop_their_sidecar(tmp_path, make_pdf):
+    pdf = make_pdf(tmp_path / "docs" / "a.pdf", ["alfa"])
+    meta = pdf_ingest.batch_index(str(tmp_path / "docs"))[0]
+    pdf.unlink()
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    assert not pdf_ingest.Path(meta["text_path"]).exists() and pdf_ingest.load_index() == {}
@@ -0,0 +1,71 @@
+import sqlite3
+import pytest
+from content_engine.src import pdf_ingest
+from content_engine.src.text_index import TextIndex, fold, tokenize
+
+def test_tokenize_folds_accents_and_plurals():
+    assert fold("Derivações") == "derivacoes"
+    assert tokenize("As derivações e os eixos elétricos") == tokenize("derivação eixo eletrico")
+
+def test_bm25_ranks_pages(tmp_path):
+    idx = TextIndex(tmp_path / "s.db")
+    idx.add_document("a.pdf", ["introdução geral", "Fibrilação atrial: ritmo irregular, fibrilação sem ondas P"])
+    idx.add_document("b.pdf", ["flutter atrial com ondas F"])
+    hits = idx.search("fibrilacao atrial")
+    assert [(h["file"], h["page"]) for h in hits] == [("a.pdf", 2), ("b.pdf", 1)]
+    assert hits[0]["snippet"].startswith("Fibrilação")
+    idx.add_document("a.pdf", ["sem conteúdo relevante"])
+    assert [h["file"] for h in idx.search("fibrilação")] == []
+    idx.close()
+    ro = TextIndex(tmp_path / "s.db", readonly=True)
+    assert [h["file"] for h in ro.search("flutter")] == ["b.pdf"]
+    with pytest.raises(sqlite3.OperationalError):
+        ro.add_document("c.pdf", ["flutter"])
+    ro.close()
+
+def test_ingest_feeds_search_and_prunes(tmp_path, make_pdf):
+    make_pdf(tmp_path / "docs" / "a.pdf", ["capa", "bloqueio atrioventricular total"])
+    pdf = make_pdf(tmp_path / "docs" / "b.pdf", ["taquicardia ventricular"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    assert [(h["page"]) for h in pdf_ingest.search("bloqueios atrioventriculares")] == [2]
+    pdf.unlink()
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    assert pdf_ingest.search("taquicardia") == []
+
+def test_existing_index_is_backfilled_into_search(tmp_path, make_pdf, monkeypatch):
+    make_pdf(tmp_path / "docs" / "a.pdf", ["capa", "pericardite com supradesnivelamento difuso"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    pdf_ingest.SEARCH_PATH.unlink()  # índice gerado antes da busca full-text
+    def no_extract(path):
+        raise AssertionError("arquivo inalterado não deve ser reextraído")
+    monkeypatch.setattr(pdf_ingest, "extract_text", no_extract)
+    assert pdf_ingest.batch_index(str(tmp_path / "docs")) == []
+    assert [h["page"] for h in pdf_ingest.search("pericardite")] == [2]
+    assert pdf_ingest.retrieve("pericardite", k=1)[0]["page"] == 2
+
+def test_chunks_are_page_tagged_overlapping_byte_ranges():
+    from content_engine.src.chunks import chunk_pages
+    pages = ["ação " * 30, "", "bloqueio de ramo " * 20]
+    chunks = list(chunk_pages(pages, size=60, overlap=20))
+    side = "\f".join(pages).encode("utf-8")
+    assert {c.page for c in chunks} == {1, 3}
+    for c in chunks:
+        assert side[c.start:c.start + c.length].decode("utf-8") == c.text
+    p1 = [c for c in chunks if c.page == 1]
+    assert all(a.start < b.start < a.start + a.length for a, b in zip(p1, p1[1:]))
+
+def test_retrieve_returns_chunk_text(tmp_path, make_pdf):
+    make_pdf(tmp_path / "docs" / "a.pdf", ["capa", "Sindrome de Brugada: supradesnivelamento de ST em V1-V2"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    hits = pdf_ingest.retrieve("brugada", k=2)
+    assert len(hits) == 1 and hits[0]["page"] == 2 and "Brugada" in hits[0]["text"]
+
+def test_crlf_pages_keep_chunk_offsets(tmp_path, make_pdf, monkeypatch):
+    pages = ["capa\r\ncom quebras\r\nwindows", "segunda pagina hipercalemia\r\ncom ondas T apiculadas"]
+    monkeypatch.setattr(pdf_ingest, "_pages", lambda reader: iter(pages))
+    make_pdf(tmp_path / "docs" / "a.pdf", ["x"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    meta = next(iter(pdf_ingest.load_index().values()))
+    assert pdf_ingest.read_pages(meta) == pages
+    hit = pdf_ingest.retrieve("hipercalemia", k=1)[0]
+    assert hit["page"] == 2 and hit["text"].startswith("segunda pagina hipercalemia")
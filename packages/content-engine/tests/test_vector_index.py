@@ -0,0 +1,55 @@
+import pytest
+from content_engine.src import pdf_ingest, vector_index
+
+np = pytest.importorskip("numpy")
+
+def test_hashing_embedder_is_normalized_and_morphology_aware():
+    emb = vector_index.HashingEmbedder(128)
+    v = emb.embed(["bloqueios atrioventriculares", "bloqueio atrioventricular", "hipercalemia"])
+    assert np.allclose(np.linalg.norm(v, axis=1), 1, atol=1e-5)
+    assert v[0] @ v[1] > v[0] @ v[2]
+
+@pytest.fixture
+def vectors_on(monkeypatch):
+    monkeypatch.setattr(pdf_ingest.CONFIG.pdf, "vector_index", True)
+
+def test_semantic_search_after_ingest(tmp_path, make_pdf, vectors_on):
+    make_pdf(tmp_path / "docs" / "a.pdf", ["capa", "hipercalemia causa ondas T apiculadas"])
+    make_pdf(tmp_path / "docs" / "b.pdf", ["bloqueio atrioventricular de terceiro grau"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    hits = pdf_ingest.semantic_search("bloqueios atrioventriculares", k=1)
+    assert hits[0]["file"].endswith("b.pdf") and "bloqueio" in hits[0]["text"]
+
+def test_ivf_search_finds_exact_neighbor(tmp_path, monkeypatch):
+    from content_engine.src.text_index import TextIndex
+    monkeypatch.setattr(vector_index.CONFIG.pdf, "vector_ivf_min", 16)
+    idx = TextIndex(tmp_path / "s.db")
+    words = [f"termo{i:03d}x{i * 7 % 13}" for i in range(100)]
+    for i, w in enumerate(words):
+        side = tmp_path / f"{i}.txt"
+        side.write_text(w, encoding="utf-8")
+        idx.add_document(f"d{i}.pdf", [w], text_path=str(side))
+    idx.close()
+    assert vector_index.build(tmp_path / "s.db", tmp_path / "vec") == 100
+    vidx = vector_index.VectorIndex.load(tmp_path / "vec")
+    assert len(vidx.centroids) == 10 and vidx.offsets[-1] == 100
+    rowid, score = vidx.search(words[42], k=1, nprobe=10)[0]
+    assert score > 0.99
+    vidx.close()
+
+def test_reingested_file_gets_fresh_vectors_and_atomic_versions(tmp_path, make_pdf, vectors_on):
+    make_pdf(tmp_path / "docs" / "a.pdf", ["hipercalemia causa ondas T apiculadas"])
+    make_pdf(tmp_path / "docs" / "b.pdf", ["bloqueio atrioventricular de terceiro grau"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    first = pdf_ingest._vector_index()
+    assert pdf_ingest._vector_index() is first  # memoizado entre consultas
+    # o FTS5 reutiliza o rowid do chunk apagado: o vetor não pode vir do texto antigo
+    make_pdf(tmp_path / "docs" / "a.pdf", ["fibrilacao atrial com resposta ventricular rapida"])
+    pdf_ingest.batch_index(str(tmp_path / "docs"))
+    hit = pdf_ingest.semantic_search("fibrilacao atrial resposta ventricular", k=1)[0]
+    assert hit["file"].endswith("a.pdf") and "fibrilacao" in hit["text"] and hit["score"] > 0.9
+    vidx = pdf_ingest._vector_index()
+    assert vidx is not first
+    out = pdf_ingest.VECTOR_DIR
+    assert (out / "CURRENT").read_text() == "v2" and sorted(d.name for d in out.glob("v*")) == ["v1", "v2"]
+    assert not list(out.glob(".*tmp")) and not (out / "meta.json").exists()
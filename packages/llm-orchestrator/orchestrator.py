@@ -1,9 +1,18 @@
-import os
-from typing import Literal, Dict
+import os, re
+from typing import Dict, Generator, Iterator, Literal
+from mega_common.text import tokens
+from response_cache import TieredCache, cache_key
 
 class LLMOrchestrator:
-    def __init__(self, strategy: str = "cost-aware"):
+    # modelo de cada estágio; faz parte da chave do cache (trocar o modelo invalida o estágio)
+    models = {"draft": "mistral-local", "refine": "gemini", "polish": "gpt"}
+
+    def __init__(self, strategy: str = "cost-aware", cache: TieredCache | None = None,
+                 stage_ttl: Dict[str, float] | None = None, min_draft_chars: int = 200):
         self.strategy = strategy
+        self.min_draft_chars = min_draft_chars
+        self.cache = cache
+        self.stage_ttl = stage_ttl or {}
 
     def generate(self, prompt: str, intent: Literal["case", "quiz", "explanation"]="case") -> Dict:
         """
@@ -11,13 +20,17 @@ class LLMOrchestrator:
         1. Tenta modelo local (Mistral via API local/Ollama)
         2. Se precisa refinamento -> chama Gemini (se chave ok)
         3. Ajuste final -> GPT (se disponível)
+        Um rascunho aprovado pela checagem de qualidade (`_needs_refine`
+        falso) é devolvido direto, sem refinamento nem polimento.
+        Com `cache`, cada estágio é cacheado pela sua própria entrada: um
+        rascunho repetido reaproveita refinamento e polimento já feitos.
         """
-        draft = self._local_infer(prompt)
+        draft = self._stage("draft", intent, prompt, lambda: self._local_infer(prompt))
         if self._needs_refine(draft):
-            refined = self._gemini_refine(draft, intent)
+            refined = self._stage("refine", intent, draft, lambda: self._gemini_refine(draft, intent))
+            final = self._stage("polish", intent, refined, lambda: self._gpt_polish(refined, intent))
         else:
-            refined = draft
-        final = self._gpt_polish(refined, intent)
+            refined = final = draft
         return {
             "prompt": prompt,
             "draft": draft,
@@ -25,12 +38,58 @@ class LLMOrchestrator:
             "final": final
         }
 
+    def generate_stream(self, prompt: str, intent: Literal["case", "quiz", "explanation"]="case"
+                        ) -> Generator[str, None, Dict]:
+        """
+        Como `generate`, mas devolve o texto final em pedaços à medida que o
+        último estágio (polimento) os produz; o retorno do gerador é o mesmo
+        dict de `generate`. Rascunho e refinamento são internos e não são
+        emitidos; se o rascunho dispensa refinamento, ele é emitido direto.
+        """
+        draft = self._stage("draft", intent, prompt, lambda: self._local_infer(prompt))
+        if not self._needs_refine(draft):
+            yield from tokens(draft)
+            return {"prompt": prompt, "draft": draft, "refined": draft, "final": draft}
+        refined = self._stage("refine", intent, draft, lambda: self._gemini_refine(draft, intent))
+        key = cache_key("polish", self.models["polish"], intent, refined) if self.cache is not None else None
+        final = self.cache.get(key) if key else None
+        if final is not None:
+            yield from tokens(final)
+        else:
+            parts = []
+            for delta in self._gpt_polish_stream(refined, intent):
+                parts.append(delta)
+                yield delta
+            final = "".join(parts)
+            if key:
+                self.cache.set(key, final, ttl=self.stage_ttl.get("polish"))
+        return {"prompt": prompt, "draft": draft, "refined": refined, "final": final}
+
+    def _stage(self, stage: str, intent: str, text: str, call):
+        if self.cache is None:
+            return call()
+        key = cache_key(stage, self.models[stage], intent, text)
+        out = self.cache.get(key)
+        if out is None:
+            out = call()
+            self.cache.set(key, out, ttl=self.stage_ttl.get(stage))
+        return out
+
     def _local_infer(self, prompt: str) -> str:
         # TODO: chamar ollama/mistral
         return f"[LOCAL_DRAFT]{prompt[:120]}..."
 
+    _UNFINISHED = re.compile(r"(\.\.\.|…|\bTODO\b|\[[A-Z_]+\])")
+
     def _needs_refine(self, text: str) -> bool:
-        return True
+        """
+        Checagem barata de qualidade do rascunho: curto demais, com marcadores
+        de placeholder/truncamento (`...`, `TODO`, `[TAG]`) ou sem terminar
+        numa frase completa pede refinamento.
+        """
+        text = text.strip()
+        return (len(text) < self.min_draft_chars or bool(self._UNFINISHED.search(text))
+                or text[-1:] not in ".!?")
 
     def _gemini_refine(self, text: str, intent: str) -> str:
         # TODO: integrar com Gemini
@@ -38,4 +97,8 @@ class LLMOrchestrator:
 
     def _gpt_polish(self, text: str, intent: str) -> str:
         # TODO: integrar com GPT
-        return f"[GPT_POLISHED]{text}"
\ No newline at end of file
+        return f"[GPT_POLISHED]{text}"
+
+    def _gpt_polish_stream(self, text: str, intent: str) -> Iterator[str]:
+        """Polimento em pedaços: a resposta de `_gpt_polish` é fatiada depois de completa."""
+        yield from tokens(self._gpt_polish(text, intent))
@@ -0,0 +1,166 @@
+from __future__ import annotations
+import hashlib, json, sqlite3, threading, time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Protocol
+
+_MISS = object()
+
+def cache_key(stage: str, model: str, intent: str, text: str) -> str:
+    """Chave endereçada por conteúdo: sha256 de (estágio, modelo, intenção, entrada)."""
+    raw = json.dumps([stage, model, intent, text], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _expires(ttl: float | None) -> float | None:
+    return None if ttl is None else time.time() + ttl
+
+class CacheTier(Protocol):
+    def get(self, key: str, default: Any = None) -> Any: ...
+    def set(self, key: str, value: Any, ttl: float | None = None, expires: float | None = None) -> None: ...
+
+class MemoryCache:
+    """LRU em memória limitado por número de entradas e bytes (tamanho do JSON do valor)."""
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 64 << 20, ttl: float | None = None):
+        self.max_entries, self.max_bytes, self.ttl = max_entries, max_bytes, ttl
+        self._data: OrderedDict[str, tuple] = OrderedDict()  # key -> (expira, valor, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            if entry[0] is not None and entry[0] <= time.time():
+                self._drop(key)
+                return default
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: Any, ttl: float | None = None, expires: float | None = None) -> None:
+        size = len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        exp = expires if expires is not None else _expires(ttl if ttl is not None else self.ttl)
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (exp, value, size)
+            self._bytes += size
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._drop(next(iter(self._data)))
+
+    def _drop(self, key: str):
+        self._bytes -= self._data.pop(key)[2]
+
+class SQLiteCache:
+    """
+    Camada em disco (SQLite/WAL). Entradas expiradas são ignoradas na leitura
+    e apagadas na evicção; acima de `max_bytes` remove as menos acessadas até
+    90% do limite. O total de bytes é mantido em memória e a evicção roda a
+    cada escrita que ultrapassa o limite.
+    """
+    def __init__(self, path: str | Path, max_bytes: int = 512 << 20, ttl: float | None = None):
+        self.path, self.max_bytes, self.ttl = Path(path), max_bytes, ttl
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("""CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL,
+            size INTEGER NOT NULL, expires REAL, accessed REAL NOT NULL) WITHOUT ROWID""")
+        self._db.execute("CREATE INDEX IF NOT EXISTS idx_cache_accessed ON cache(accessed)")
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+
+    def get_entry(self, key: str):
+        """(valor, expira) ou None; atualiza o instante de acesso (LRU)."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT value, expires FROM cache WHERE key=?", (key,)).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                return None
+            self._db.execute("UPDATE cache SET accessed=? WHERE key=?", (now, key))
+        return json.loads(row[0]), row[1]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.get_entry(key)
+        return default if entry is None else entry[0]
+
+    def set(self, key: str, value: Any, ttl: float | None = None, expires: float | None = None) -> None:
+        raw = json.dumps(value, ensure_ascii=False)
+        size = len(raw.encode("utf-8"))
+        exp = expires if expires is not None else _expires(ttl if ttl is not None else self.ttl)
+        with self._lock:
+            old = self._db.execute("SELECT size FROM cache WHERE key=?", (key,)).fetchone()
+            self._db.execute("INSERT OR REPLACE INTO cache VALUES (?,?,?,?,?)", (key, raw, size, exp, time.time()))
+            self._bytes += size - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        now = time.time()
+        self._db.execute("BEGIN")
+        self._db.execute("DELETE FROM cache WHERE expires IS NOT NULL AND expires <= ?", (now,))
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+        target = int(self.max_bytes * 0.9)
+        if total > target:
+            freed, keys = 0, []
+            for key, size in self._db.execute("SELECT key, size FROM cache ORDER BY accessed"):
+                if total - freed <= target:
+                    break
+                keys.append((key,))
+                freed += size
+            self._db.executemany("DELETE FROM cache WHERE key=?", keys)
+            total -= freed
+        self._db.execute("COMMIT")
+        self._bytes = total
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+class TieredCache:
+    """
+    Cache em camadas (ex.: memória → SQLite). A leitura consulta as camadas
+    em ordem e promove o valor encontrado para as anteriores, preservando o
+    prazo de expiração; a escrita vai para todas.
+    """
+    def __init__(self, *tiers):
+        self.tiers = tiers
+        self.hits = self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        for i, tier in enumerate(self.tiers):
+            if hasattr(tier, "get_entry"):
+                entry = tier.get_entry(key)
+                value, exp = entry if entry is not None else (_MISS, None)
+            else:
+                value, exp = tier.get(key, _MISS), None
+            if value is not _MISS:
+                for upper in self.tiers[:i]:
+                    upper.set(key, value, expires=exp)
+                self.hits += 1
+                return value
+        self.misses += 1
+        return default
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        # sem ttl explícito cada camada aplica o próprio ttl padrão
+        exp = _expires(ttl)
+        for tier in self.tiers:
+            tier.set(key, value, expires=exp)
+
+def make_cache(path: str | Path | None = None, max_entries: int = 1024, memory_bytes: int = 64 << 20,
+               disk_bytes: int = 512 << 20, ttl: float | None = None) -> TieredCache:
+    """Memória LRU e, se `path` for dado, uma camada SQLite persistente atrás dela."""
+    tiers = [MemoryCache(max_entries, memory_bytes, ttl)]
+    if path is not None:
+        tiers.append(SQLiteCache(path, disk_bytes, ttl))
+    return TieredCache(*tiers)
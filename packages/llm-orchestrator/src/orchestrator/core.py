@@ -1,11 +1,210 @@
-class MultiLLMOrchestrator:
-    """Stub de orquestrador multi-LLM.
+from __future__ import annotations
+import threading, time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Iterator, NamedTuple, Protocol
+from mega_common.text import tokens
+
+class Provider(Protocol):
+    name: str
+    cost_per_1k_tokens: float
+
+    def generate(self, prompt: str) -> str: ...
+
+class StubProvider:
+    """Provider local para testes/desenvolvimento: latência fixa, custo e falhas simulados."""
+    def __init__(self, name: str, latency: float = 0.0, cost_per_1k_tokens: float = 0.0, fail: bool = False):
+        self.name, self.latency, self.cost_per_1k_tokens, self.fail = name, latency, cost_per_1k_tokens, fail
+
+    def generate(self, prompt: str) -> str:
+        time.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError(f"{self.name} indisponível")
+        return self._text(prompt)
+
+    def _text(self, prompt: str) -> str:
+        return f"[{self.name}] {prompt[:40]}..."
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        """Mesmo texto de `generate`, com `latency` dividida entre o primeiro pedaço e o resto."""
+        parts = list(tokens(self._text(prompt)))
+        time.sleep(self.latency / 2)
+        if self.fail:
+            raise RuntimeError(f"{self.name} indisponível")
+        for i, part in enumerate(parts):
+            if i:
+                time.sleep(self.latency / 2 / max(1, len(parts) - 1))
+            yield part
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)  # ~4 caracteres por token
+
+class ProviderStats:
+    """Janela deslizante das últimas `window` chamadas: latência, erros, tokens e custo acumulados."""
+    def __init__(self, window: int = 100):
+        self.latencies: deque = deque(maxlen=window)
+        self.outcomes: deque = deque(maxlen=window)  # True = sucesso
+        self.calls = self.tokens = 0
+        self.cost = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool, tokens: int = 0, cost: float = 0.0):
+        with self._lock:
+            self.outcomes.append(ok)
+            if ok:
+                self.latencies.append(latency)
+            self.calls += 1
+            self.tokens += tokens
+            self.cost += cost
+
+    def percentile(self, q: float) -> float | None:
+        with self._lock:
+            lat = sorted(self.latencies)
+        if not lat:
+            return None
+        return lat[min(len(lat) - 1, int(q * len(lat)))]
+
+    @property
+    def error_rate(self) -> float:
+        with self._lock:
+            return 0.0 if not self.outcomes else 1 - sum(self.outcomes) / len(self.outcomes)
 
-    Futuro: roteamento dinâmico baseado em custo, latência e qualidade.
+    def snapshot(self) -> dict:
+        return {"calls": self.calls, "p50": self.percentile(0.5), "p95": self.percentile(0.95),
+                "error_rate": round(self.error_rate, 3), "tokens": self.tokens, "cost": round(self.cost, 6)}
+
+class RouteResult(NamedTuple):
+    text: str
+    provider: str
+    latency: float
+    hedged: bool
+
+class MultiLLMOrchestrator:
     """
-    def __init__(self, providers=None):
+    Roteador multi-LLM. Ordena os providers por
+    `latency_weight × p95 + cost_weight × custo/1k tokens + error_weight × taxa de erro`
+    (providers sem histórico têm p95 = 0 e são experimentados primeiro).
+    Se o escolhido não responde em `hedge_after` segundos (ou no seu p95,
+    se já houver histórico), dispara a mesma requisição no próximo e usa a
+    primeira resposta válida; em erro passa direto ao próximo. As chamadas
+    perdedoras continuam alimentando as métricas quando terminam. Um provider
+    não tentado há `probe_after` segundos vai à frente numa requisição (sonda),
+    para que um provider rebaixado por erros ou latência possa se recuperar;
+    se a sonda falhar ou demorar, o hedge/fallback cobre a resposta.
+    """
+    def __init__(self, providers=None, latency_weight: float = 1.0, cost_weight: float = 1.0,
+                 error_weight: float = 10.0, hedge_after: float = 2.0, window: int = 100, max_workers: int = 8,
+                 probe_after: float | None = 30.0):
         self.providers = providers or []
+        self.latency_weight, self.cost_weight, self.error_weight = latency_weight, cost_weight, error_weight
+        self.hedge_after = hedge_after
+        self.stats = {p.name: ProviderStats(window) for p in self.providers}
+        self.probe_after = probe_after
+        self._tried = {p.name: time.monotonic() for p in self.providers}  # última tentativa por provider
+        self._probe_lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="llm") if self.providers else None
+
+    def score(self, provider) -> float:
+        st = self.stats[provider.name]
+        return (self.latency_weight * (st.percentile(0.95) or 0.0)
+                + self.cost_weight * provider.cost_per_1k_tokens + self.error_weight * st.error_rate)
+
+    def ranked(self) -> list:
+        order = sorted(self.providers, key=self.score)
+        if self.probe_after is None:
+            return order
+        now = time.monotonic()
+        with self._probe_lock:
+            stale = [p for p in order[1:] if now - self._tried[p.name] >= self.probe_after]
+            if not stale:
+                return order
+            self._tried[stale[0].name] = now  # uma sonda por vez
+        order.remove(stale[0])
+        return [stale[0], *order]
+
+    def _call(self, provider, prompt: str) -> str:
+        t0 = self._tried[provider.name] = time.monotonic()
+        try:
+            out = provider.generate(prompt)
+        except Exception:
+            self.stats[provider.name].record(time.monotonic() - t0, False)
+            raise
+        tokens = estimate_tokens(prompt) + estimate_tokens(out)
+        self.stats[provider.name].record(time.monotonic() - t0, True, tokens,
+                                         tokens / 1000 * provider.cost_per_1k_tokens)
+        return out
+
+    def _deadline(self, provider) -> float:
+        p95 = self.stats[provider.name].percentile(0.95)
+        return self.hedge_after if p95 is None else min(self.hedge_after, max(p95, 0.01))
+
+    def route(self, prompt: str) -> RouteResult:
+        if not self.providers:
+            return RouteResult(self.generate(prompt), "stub", 0.0, False)
+        queue = self.ranked()
+        t0 = time.monotonic()
+        running, errors, hedged = {}, [], False
+        def launch():
+            p = queue.pop(0)
+            running[self._pool.submit(self._call, p, prompt)] = p
+        launch()
+        while running:
+            timeout = self._deadline(next(iter(running.values()))) if queue and len(running) == 1 else None
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            if not done:  # prazo estourado: hedge no próximo provider
+                hedged = True
+                launch()
+                continue
+            for fut in done:
+                p = running.pop(fut)
+                try:
+                    return RouteResult(fut.result(), p.name, time.monotonic() - t0, hedged)
+                except Exception as e:
+                    errors.append(f"{p.name}: {e}")
+            if not running and queue:
+                launch()
+        raise RuntimeError(f"Todos os providers falharam: {'; '.join(errors)}")
+
+    def generate_stream(self, prompt: str) -> Iterator[str]:
+        """
+        Streaming pelo provider mais bem ranqueado que tenha `stream`. Sem
+        hedge: depois do primeiro pedaço a resposta fica presa ao provider;
+        uma falha antes dele passa ao próximo. Sem provider de streaming
+        disponível, a resposta completa de `generate` sai num único pedaço.
+        """
+        errors = []
+        for p in self.ranked():
+            if not hasattr(p, "stream"):
+                continue
+            t0, parts = time.monotonic(), []
+            self._tried[p.name] = t0
+            try:
+                for delta in p.stream(prompt):
+                    parts.append(delta)
+                    yield delta
+            except Exception as e:
+                self.stats[p.name].record(time.monotonic() - t0, False)
+                if parts:
+                    raise
+                errors.append(f"{p.name}: {e}")
+                continue
+            out = "".join(parts)
+            tokens = estimate_tokens(prompt) + estimate_tokens(out)
+            self.stats[p.name].record(time.monotonic() - t0, True, tokens, tokens / 1000 * p.cost_per_1k_tokens)
+            return
+        if errors and all(hasattr(p, "stream") for p in self.providers):
+            raise RuntimeError(f"Todos os providers falharam: {'; '.join(errors)}")
+        yield self.generate(prompt)
 
     def generate(self, prompt: str) -> str:
-        # Placeholder local
-        return f"[stub-response] {prompt[:40]}..."
\ No newline at end of file
+        if not self.providers:
+            # Placeholder local
+            return f"[stub-response] {prompt[:40]}..."
+        return self.route(prompt).text
+
+    def metrics(self) -> dict:
+        return {name: st.snapshot() for name, st in self.stats.items()}
+
+    def close(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
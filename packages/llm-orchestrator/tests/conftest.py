@@ -0,0 +1,15 @@
+import importlib.util, sys
+from pathlib import Path
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+# orchestrator.py e response_cache.py ficam na raiz do pacote (fora de src/)
+sys.path.insert(0, str(ROOT))
+
+@pytest.fixture(scope="session")
+def core():
+    # src/orchestrator/core.py carregado pelo caminho: o nome `orchestrator` já é o módulo da raiz
+    spec = importlib.util.spec_from_file_location("orchestrator_core", ROOT / "src" / "orchestrator" / "core.py")
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
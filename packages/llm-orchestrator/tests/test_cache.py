@@ -0,0 +1,46 @@
+import time
+from orchestrator import LLMOrchestrator
+from response_cache import MemoryCache, SQLiteCache, TieredCache, cache_key, make_cache
+
+def test_memory_lru_evicts_by_entries_bytes_and_ttl():
+    c = MemoryCache(max_entries=2, max_bytes=100)
+    c.set("a", "x"); c.set("b", "y"); c.get("a"); c.set("c", "z")
+    assert c.get("b") is None and c.get("a") == "x" and len(c) == 2
+    c.set("big", "w" * 200)
+    assert c.get("big") is None
+    c.set("t", 1, ttl=-1)
+    assert c.get("t", "miss") == "miss"
+
+def test_sqlite_tier_persists_and_evicts_least_recently_accessed(tmp_path):
+    db = tmp_path / "cache.db"
+    c = SQLiteCache(db, max_bytes=60)
+    for k in "abc":
+        c.set(k, k * 15)
+        time.sleep(0.002)
+    c.get("a")
+    c.set("d", "d" * 15)  # 4 × 17 bytes > 60: sai o menos acessado ("b")
+    assert c.get("b") is None and c.get("a") == "a" * 15
+    c.close()
+    assert SQLiteCache(db, max_bytes=60).get("d") == "d" * 15
+
+def test_tiered_promotes_disk_hits(tmp_path):
+    disk = SQLiteCache(tmp_path / "c.db")
+    disk.set("k", {"v": 1}, ttl=60)
+    mem = MemoryCache()
+    cache = TieredCache(mem, disk)
+    assert cache.get("k") == {"v": 1} and mem.get("k") == {"v": 1} and cache.hits == 1
+    assert cache.get("nope") is None and cache.misses == 1
+
+def test_orchestrator_caches_each_stage(tmp_path, monkeypatch):
+    calls = []
+    orch = LLMOrchestrator(cache=make_cache(tmp_path / "llm.db"))
+    for name in ("_local_infer", "_gemini_refine", "_gpt_polish"):
+        original = getattr(orch, name)
+        monkeypatch.setattr(orch, name, lambda *a, _n=name, _f=original: calls.append(_n) or _f(*a))
+    first = orch.generate("ECG com BAV")
+    assert orch.generate("ECG com BAV") == first and len(calls) == 3
+    # mesmo rascunho (prefixo de 120 caracteres) reaproveita refinamento e polimento
+    orch.generate("x" * 120 + "a"); orch.generate("x" * 120 + "b")
+    assert calls[3:] == ["_local_infer", "_gemini_refine", "_gpt_polish", "_local_infer"]
+    assert cache_key("draft", "m", "case", "p") != cache_key("draft", "m", "quiz", "p")
+    assert LLMOrchestrator(cache=make_cache(tmp_path / "llm.db")).generate("ECG com BAV") == first
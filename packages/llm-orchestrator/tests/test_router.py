@@ -0,0 +1,69 @@
+import time
+import pytest
+from orchestrator import LLMOrchestrator
+
+def test_routes_by_cost_and_records_metrics(core):
+    cheap, pricey = core.StubProvider("cheap", cost_per_1k_tokens=0.1), core.StubProvider("pricey", cost_per_1k_tokens=5)
+    router = core.MultiLLMOrchestrator([pricey, cheap])
+    res = router.route("explique o eixo cardíaco")
+    assert res.provider == "cheap" and not res.hedged
+    m = router.metrics()["cheap"]
+    assert m["calls"] == 1 and m["error_rate"] == 0 and m["tokens"] > 0 and m["cost"] > 0
+    assert router.metrics()["pricey"]["calls"] == 0
+
+def test_errors_fall_back_and_demote_provider(core):
+    bad, good = core.StubProvider("bad", fail=True), core.StubProvider("good", cost_per_1k_tokens=1)
+    router = core.MultiLLMOrchestrator([bad, good])
+    assert router.route("x").provider == "good"
+    assert router.metrics()["bad"]["error_rate"] == 1.0 and router.ranked()[0] is good
+    with pytest.raises(RuntimeError, match="Todos os providers falharam"):
+        core.MultiLLMOrchestrator([bad]).route("x")
+
+def test_demoted_provider_recovers_through_probes(core):
+    flaky, good = core.StubProvider("flaky", fail=True, cost_per_1k_tokens=0.1), core.StubProvider("good", cost_per_1k_tokens=1)
+    router = core.MultiLLMOrchestrator([flaky, good], window=2, probe_after=0.05)
+    assert router.route("x").provider == "good" and router.ranked()[0] is good
+    flaky.fail = False
+    assert router.route("x").provider == "good"  # sem sonda antes de `probe_after`
+    time.sleep(0.06)
+    assert router.route("x").provider == "flaky" and router.ranked()[0] is good
+    time.sleep(0.06)
+    assert router.route("x").provider == "flaky" and router.metrics()["flaky"]["error_rate"] == 0
+    assert router.score(flaky) < router.score(good)
+
+def test_hedges_slow_primary(core):
+    slow, backup = core.StubProvider("slow", latency=0.5), core.StubProvider("backup", latency=0.01, cost_per_1k_tokens=1)
+    router = core.MultiLLMOrchestrator([slow, backup], hedge_after=0.05)
+    t0 = time.monotonic()
+    res = router.route("x")
+    assert res.provider == "backup" and res.hedged and time.monotonic() - t0 < 0.3
+    assert core.MultiLLMOrchestrator().generate("abc").startswith("[stub-response]")
+
+def test_good_draft_skips_refine_and_polish(monkeypatch):
+    orch = LLMOrchestrator()
+    text = "O eixo elétrico é estimado pelas derivações I e aVF. " * 5
+    monkeypatch.setattr(orch, "_local_infer", lambda prompt: text)
+    monkeypatch.setattr(orch, "_gemini_refine", lambda *a: pytest.fail("refine chamado"))
+    out = orch.generate("eixo")
+    assert out["final"] == out["refined"] == text
+    assert LLMOrchestrator().generate("eixo")["final"].startswith("[GPT_POLISHED]")
+
+def test_stream_first_token_before_full_latency(core):
+    router = core.MultiLLMOrchestrator([core.StubProvider("bad", fail=True), core.StubProvider("slow", latency=0.4, cost_per_1k_tokens=1)])
+    t0 = time.monotonic()
+    stream = router.generate_stream("explique bloqueio AV de primeiro grau")
+    first = next(stream)
+    assert time.monotonic() - t0 < 0.35
+    assert first + "".join(stream) == core.StubProvider("slow")._text("explique bloqueio AV de primeiro grau")
+    assert router.metrics()["slow"]["calls"] == 1 and router.metrics()["bad"]["error_rate"] == 1.0
+
+def test_llm_orchestrator_stream_matches_generate():
+    orch = LLMOrchestrator()
+    stream = orch.generate_stream("ECG com BAV", intent="explanation")
+    parts = []
+    try:
+        while True:
+            parts.append(next(stream))
+    except StopIteration as stop:
+        result = stop.value
+    assert len(parts) > 1 and "".join(parts) == result["final"] == orch.generate("ECG com BAV")["final"]
@@ -1,4 +1,7 @@
+import json
 from abc import ABC, abstractmethod
+from typing import Iterator
+from mega_common.text import tokens
 
 class Agent(ABC):
     role: str = "generic"
@@ -8,4 +11,13 @@ class Agent(ABC):
 
     @abstractmethod
     def act(self, **kwargs):
-        ...
\ No newline at end of file
+        ...
+
+    def act_stream(self, **kwargs) -> Iterator[str]:
+        """
+        Saída em pedaços, para exibir à medida que chega. Padrão: o resultado
+        completo de `act` (texto, ou JSON se estruturado); agentes de texto
+        longo sobrescrevem para repassar o streaming do orquestrador.
+        """
+        out = self.act(**kwargs)
+        yield from tokens(out) if isinstance(out, str) else [json.dumps(out, ensure_ascii=False)]
@@ -0,0 +1,109 @@
+from __future__ import annotations
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, NamedTuple, Tuple
+
+@dataclass
+class Task:
+    """Chamada de agente no DAG; `fn` recebe os resultados de `deps` como kwargs."""
+    fn: Callable[..., Any]
+    deps: Tuple[str, ...] = ()
+    timeout: float | None = None
+
+_POLL = 0.02  # intervalo de verificação enquanto há tarefas com prazo aguardando worker
+
+class DagResult(NamedTuple):
+    results: Dict[str, Any]
+    errors: Dict[str, str]  # tarefa -> motivo (exceção, timeout ou dependência que falhou)
+
+def _order(tasks: Dict[str, Task]) -> list[str]:
+    order, state = [], {}
+    def visit(name, path=()):
+        if state.get(name) == 2:
+            return
+        if state.get(name) == 1:
+            raise ValueError(f"ciclo no DAG: {' -> '.join((*path, name))}")
+        if name not in tasks:
+            raise ValueError(f"dependência desconhecida: {name}")
+        state[name] = 1
+        for d in tasks[name].deps:
+            visit(d, (*path, name))
+        state[name] = 2
+        order.append(name)
+    for name in tasks:
+        visit(name)
+    return order
+
+def _skip(name: str, task: Task, errors: Dict[str, str]) -> bool:
+    failed = [d for d in task.deps if d in errors]
+    if failed:
+        errors[name] = f"dependência falhou: {', '.join(failed)}"
+    return bool(failed)
+
+def run_dag(tasks: Dict[str, Task], max_workers: int = 1, timeout: float | None = None) -> DagResult:
+    """
+    Executa as tarefas respeitando as dependências. Com `max_workers > 1`,
+    tarefas independentes rodam em paralelo num pool de threads e cada uma
+    é submetida assim que suas dependências terminam; a latência total
+    tende ao caminho crítico. `timeout` (ou `Task.timeout`) limita cada
+    chamada a partir do seu início real (não conta a espera por worker):
+    a tarefa vira erro e as dependentes são puladas (a thread não é
+    interrompida, só deixa de ser aguardada). Com `max_workers <= 1` roda
+    em ordem topológica na thread atual, sem timeout.
+    """
+    order = _order(tasks)
+    results: Dict[str, Any] = {}
+    errors: Dict[str, str] = {}
+    if max_workers <= 1:
+        for name in order:
+            task = tasks[name]
+            if _skip(name, task, errors):
+                continue
+            try:
+                results[name] = task.fn(**{d: results[d] for d in task.deps})
+            except Exception as e:
+                errors[name] = f"{type(e).__name__}: {e}"
+        return DagResult(results, errors)
+    pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="agent")
+    running: Dict[Future, Tuple[str, float | None]] = {}  # future -> (tarefa, limite em s)
+    started: Dict[str, float] = {}
+    pending = list(order)
+    def call(name, fn, kwargs):
+        # o prazo conta a partir do início real, não da espera por um worker livre
+        started[name] = time.monotonic()
+        return fn(**kwargs)
+    try:
+        while pending or running:
+            for name in list(pending):
+                task = tasks[name]
+                if _skip(name, task, errors):
+                    pending.remove(name)
+                elif all(d in results for d in task.deps):
+                    pending.remove(name)
+                    limit = task.timeout if task.timeout is not None else timeout
+                    fut = pool.submit(call, name, task.fn, {d: results[d] for d in task.deps})
+                    running[fut] = (name, limit)
+            if not running:
+                continue
+            deadlines = [started[n] + lim for n, lim in running.values() if lim is not None and n in started]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            if any(lim is not None and n not in started for n, lim in running.values()):
+                wait_for = _POLL if wait_for is None else min(wait_for, _POLL)  # tarefa na fila pode começar
+            done, _ = wait(running, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for fut in done:
+                name, _ = running.pop(fut)
+                try:
+                    results[name] = fut.result()
+                except Exception as e:
+                    errors[name] = f"{type(e).__name__}: {e}"
+            now = time.monotonic()
+            for fut, (name, lim) in list(running.items()):
+                if lim is not None and name in started and started[name] + lim <= now:
+                    running.pop(fut)
+                    fut.cancel()
+                    errors[name] = "timeout"
+    finally:
+        # não espera threads de tarefas expiradas
+        pool.shutdown(wait=False, cancel_futures=True)
+    return DagResult(results, errors)
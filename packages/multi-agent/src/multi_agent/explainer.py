@@ -1,11 +1,21 @@
-from .base import Agent
+from .base import Agent, tokens
 
 class ExplainerAgent(Agent):
     role = "explainer"
 
     def act(self, concept: str, level: str="basico"):
+        return "".join(self.act_stream(concept, level))
+
+    def act_stream(self, concept: str, level: str="basico"):
+        # com orquestrador de streaming, repassa os tokens conforme chegam
+        if hasattr(self.orchestrator, "generate_stream"):
+            yield from self.orchestrator.generate_stream(f"Explique {concept} em nível {level}.")
+            return
+        yield from tokens(self._placeholder(concept, level))
+
+    def _placeholder(self, concept: str, level: str) -> str:
         if level == "basico":
             return f"{concept}: Explicação simples inicial."
         if level == "intermediario":
             return f"{concept}: Detalhes adicionais e contexto clínico."
-        return f"{concept}: Discussão aprofundada com nuances avançadas."
\ No newline at end of file
+        return f"{concept}: Discussão aprofundada com nuances avançadas."
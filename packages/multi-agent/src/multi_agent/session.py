@@ -2,20 +2,41 @@ from .tutor import TutorAgent
 from .critic import CriticAgent
 from .explainer import ExplainerAgent
 from .failsafe import FailSafeAgent
+from .dag import DagResult, Task, run_dag
+
+LEVELS = ("basico", "intermediario", "avancado")
 
 class MultiAgentSession:
-    def __init__(self, orchestrator=None):
+    """
+    Sessão com os quatro agentes. `max_workers > 1` ativa o modo concorrente:
+    chamadas independentes rodam em paralelo (ver `run`), com `timeout`
+    segundos por chamada.
+    """
+    def __init__(self, orchestrator=None, max_workers: int = 1, timeout: float | None = None):
         self.tutor = TutorAgent(orchestrator)
         self.critic = CriticAgent(orchestrator)
         self.explainer = ExplainerAgent(orchestrator)
         self.failsafe = FailSafeAgent(orchestrator)
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def run(self, tasks: dict[str, Task]) -> DagResult:
+        return run_dag(tasks, max_workers=self.max_workers, timeout=self.timeout)
 
     def run_plan(self, topic: str):
         return self.tutor.act(topic=topic)
 
+    def explain_tasks(self, concept: str) -> dict[str, Task]:
+        return {lvl: Task(lambda lvl=lvl: self.explainer.act(concept, lvl)) for lvl in LEVELS}
+
+    def explain_stream(self, concept: str):
+        """(nível, pedaço) à medida que o explainer produz cada nível, em ordem."""
+        for lvl in LEVELS:
+            for delta in self.explainer.act_stream(concept, lvl):
+                yield lvl, delta
+
     def explain_levels(self, concept: str):
-        return {
-            "basico": self.explainer.act(concept, "basico"),
-            "intermediario": self.explainer.act(concept, "intermediario"),
-            "avancado": self.explainer.act(concept, "avancado"),
-        }
\ No newline at end of file
+        res = self.run(self.explain_tasks(concept))
+        if res.errors:
+            raise RuntimeError(f"Falha no explainer: {res.errors}")
+        return {lvl: res.results[lvl] for lvl in LEVELS}
@@ -0,0 +1,54 @@
+import json, time
+import pytest
+from multi_agent.dag import Task, run_dag
+from multi_agent.session import MultiAgentSession
+
+def _sleep(s, value):
+    def fn(**deps):
+        time.sleep(s)
+        return value if not deps else (value, *sorted(deps.values()))
+    return fn
+
+def test_dag_runs_independent_tasks_concurrently():
+    tasks = {"plan": Task(_sleep(0.1, "p")), **{f"e{i}": Task(_sleep(0.1, i)) for i in range(3)},
+             "critic": Task(_sleep(0.1, "c"), deps=("plan",))}
+    t0 = time.monotonic()
+    res, errors = run_dag(tasks, max_workers=6)
+    assert time.monotonic() - t0 < 0.35 and not errors  # caminho crítico: plan -> critic
+    assert res["critic"] == ("c", "p") and res["e2"] == 2
+    assert run_dag(tasks, max_workers=1).results == res
+
+def test_dag_timeout_and_failures_skip_dependents():
+    def boom():
+        raise ValueError("x")
+    tasks = {"slow": Task(_sleep(0.5, "s")), "after": Task(_sleep(0, "a"), deps=("slow",)),
+             "bad": Task(boom), "ok": Task(_sleep(0, "k"))}
+    t0 = time.monotonic()
+    res, errors = run_dag(tasks, max_workers=4, timeout=0.1)
+    assert time.monotonic() - t0 < 0.4
+    assert res == {"ok": "k"}
+    assert errors == {"slow": "timeout", "after": "dependência falhou: slow", "bad": "ValueError: x"}
+    with pytest.raises(ValueError):
+        run_dag({"a": Task(_sleep(0, 1), deps=("b",)), "b": Task(_sleep(0, 2), deps=("a",))})
+
+def test_dag_timeout_ignores_time_waiting_for_worker():
+    tasks = {n: Task(_sleep(0.3, n)) for n in "abc"}
+    res, errors = run_dag(tasks, max_workers=2, timeout=0.5)
+    assert errors == {} and res == {"a": "a", "b": "b", "c": "c"}
+
+def test_session_explain_levels_concurrent_matches_sequential():
+    assert MultiAgentSession(max_workers=3).explain_levels("ECG") == MultiAgentSession().explain_levels("ECG")
+
+def test_act_stream_matches_act_and_uses_streaming_orchestrator():
+    from multi_agent.explainer import ExplainerAgent
+    from multi_agent.tutor import TutorAgent
+    agent = ExplainerAgent()
+    assert len(list(agent.act_stream("ECG", "avancado"))) > 1
+    assert "".join(agent.act_stream("ECG", "avancado")) == agent.act("ECG", "avancado")
+    assert json.loads("".join(TutorAgent().act_stream(topic="ECG"))) == TutorAgent().act(topic="ECG")
+    class Orch:
+        def generate_stream(self, prompt):
+            yield from ("a ", "b")
+    assert list(ExplainerAgent(Orch()).act_stream("ECG")) == ["a ", "b"]
+    levels = [lvl for lvl, _ in MultiAgentSession().explain_stream("ECG")]
+    assert levels[0] == "basico" and levels[-1] == "avancado"